@@ -1,3 +1,6 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -7,16 +10,98 @@ from requests.exceptions import RequestException
 
 from .models import Play, PlaySession, StoryOwnership
 from .forms import StoryForm, PageForm, ChoiceForm, RatingForm, ReportForm
-from web.flask_client import flask_get, flask_post, flask_put, flask_delete
+from web.flask_client import flask_get, flask_get_page, flask_post, flask_put, flask_delete
 from .permissions import author_required
 from .utils import get_session_key
 from .models import StoryRating, StoryReport
 
+from django.core.cache import cache
 from django.utils import timezone
 from django.contrib.auth.decorators import user_passes_test
 from .models import StoryReport
 
 
+# lookahead: a cached page carries the pages its choices lead to. Serving
+# it stores those pages as well, so the next click is rendered locally, and
+# their own next pages are fetched in the background to keep the chain
+# going. Builder edits mark the story, which makes older entries stale; the
+# TTL bounds staleness for edits made straight through the Flask API.
+PAGE_PREFETCH_TTL = 60
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=4)
+
+
+def _page_cache_key(page_id):
+    return f"flask_page:{page_id}"
+
+
+def _story_edited_key(story_id):
+    return f"flask_story_edited:{story_id}"
+
+
+def forget_story_pages(story_id):
+    # outlives every entry fetched before the edit
+    cache.set(_story_edited_key(story_id), time.time(), PAGE_PREFETCH_TTL)
+
+
+def _cached_page(page_id):
+    entry = cache.get(_page_cache_key(page_id))
+    if entry is None:
+        return None
+    edited = cache.get(_story_edited_key(entry["data"]["page"]["story_id"]))
+    if edited is not None and entry["fetched_at"] <= edited:
+        return None
+    return entry
+
+
+def _store_pages(pages, fetched_at):
+    entries = {_page_cache_key(p["page"]["id"]): {"data": p, "fetched_at": fetched_at} for p in pages}
+    cache.set_many(entries, PAGE_PREFETCH_TTL)
+    return entries
+
+
+def _fetch_page(path):
+    fetched_at = time.time()
+    data = flask_get(path, params={"include": "next"})
+    return _store_pages([data], fetched_at)[_page_cache_key(data["page"]["id"])]
+
+
+def _refill(page_id):
+    try:
+        _fetch_page(f"/pages/{page_id}")
+    except Exception:
+        pass
+    finally:
+        cache.delete(f"flask_page_refill:{page_id}")
+
+
+def _remember_next_pages(entry):
+    """Store the pages an entry leads to and fetch their next pages in the background."""
+    next_pages = entry["data"].get("next_pages")
+    if next_pages is None:
+        # stored without its lookahead: fetch it again, with it
+        targets = [entry["data"]["page"]["id"]]
+    else:
+        targets = []
+        for p in next_pages:
+            cached = _cached_page(p["page"]["id"])
+            if cached is None:
+                _store_pages([p], entry["fetched_at"])
+            if cached is None or "next_pages" not in cached["data"]:
+                targets.append(p["page"]["id"])
+
+    for page_id in targets:
+        # one refill per page at a time, across requests
+        if cache.add(f"flask_page_refill:{page_id}", True, PAGE_PREFETCH_TTL):
+            _prefetch_pool.submit(_refill, page_id)
+
+
+def fetch_page(page_id: int):
+    entry = _cached_page(page_id) or _fetch_page(f"/pages/{page_id}")
+    _remember_next_pages(entry)
+    return entry["data"]
+
+
 def require_story_owner(request, story_id: int):
     # staff can do everything
     if request.user.is_staff:
@@ -24,13 +109,20 @@ def require_story_owner(request, story_id: int):
     get_object_or_404(StoryOwnership, story_id=story_id, owner=request.user)
 
 
+STORY_LIST_PAGE_SIZE = 24
+
+
 # Public list (published) + autosave resume map (Level 13)
 def story_list(request):
+    params = {"status": "published", "limit": STORY_LIST_PAGE_SIZE}
+    if request.GET.get("cursor"):
+        params["cursor"] = request.GET["cursor"]
+
     try:
-        stories = flask_get("/stories", params={"status": "published"})
+        stories, next_cursor = flask_get_page("/stories", params=params)
         error = None
     except Exception as e:
-        stories = []
+        stories, next_cursor = [], None
         error = f"Flask API error: {e}"
 
     session_key = get_session_key(request)
@@ -45,7 +137,8 @@ def story_list(request):
     return render(
         request,
         "stories/story_list.html",
-        {"stories": stories, "error": error, "resume_map": resume_map},
+        {"stories": stories, "error": error, "resume_map": resume_map,
+         "next_cursor": next_cursor},
     )
 
 
@@ -86,7 +179,9 @@ def play_start(request, story_id: int):
             del request.session[k]
 
     try:
-        data = flask_get(f"/stories/{story_id}/start")
+        entry = _fetch_page(f"/stories/{story_id}/start")
+        _remember_next_pages(entry)
+        data = entry["data"]
     except RequestException:
         messages.error(
             request, "This story has no start page yet. Open Build and create a start page.")
@@ -111,7 +206,7 @@ def play_start(request, story_id: int):
 @login_required
 def play_page(request, page_id: int):
     try:
-        data = flask_get(f"/pages/{page_id}")
+        data = fetch_page(page_id)
     except Exception as e:
         raise Http404(f"Flask API error: {e}")
 
@@ -199,6 +294,7 @@ def story_edit(request, story_id: int):
         form = StoryForm(request.POST)
         if form.is_valid():
             flask_put(f"/stories/{story_id}", form.cleaned_data)
+            forget_story_pages(story_id)
             messages.success(request, "Story updated in Flask.")
             return redirect("story_list")
     else:
@@ -220,6 +316,7 @@ def story_delete(request, story_id: int):
 
     if request.method == "POST":
         flask_delete(f"/stories/{story_id}")
+        forget_story_pages(story_id)
         StoryOwnership.objects.filter(story_id=story_id).delete()
         messages.success(request, "Story deleted.")
         return redirect("story_list")
@@ -248,6 +345,7 @@ def story_builder(request, story_id: int):
                     payload.pop("ending_label", None)
 
                 created = flask_post(f"/stories/{story_id}/pages", payload)
+                forget_story_pages(story_id)
                 messages.success(
                     request, f"Page created (id={created.get('id')}).")
                 return redirect("story_builder", story_id=story_id)
@@ -259,6 +357,7 @@ def story_builder(request, story_id: int):
                 page_id = payload.pop("page_id")
 
                 created = flask_post(f"/pages/{page_id}/choices", payload)
+                forget_story_pages(story_id)
                 messages.success(
                     request, f"Choice created (id={created.get('id')}).")
                 return redirect("story_builder", story_id=story_id)
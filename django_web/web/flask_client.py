@@ -35,6 +35,14 @@ def flask_get(path, params=None):
     return _handle_response(r)
 
 
+def flask_get_page(path, params=None):
+    """
+    GET a keyset-paginated list; returns (items, next_cursor)
+    """
+    r = requests.get(f"{BASE}{path}", params=params, headers=_headers(False))
+    return _handle_response(r), r.headers.get("X-Next-Cursor")
+
+
 def flask_post(path, data):
     r = requests.post(f"{BASE}{path}", json=data, headers=_headers(True))
     return _handle_response(r)
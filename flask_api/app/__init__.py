@@ -1,22 +1,47 @@
 # flask_api/app/__init__.py
 from flask import Flask
 from app.config import Config
+from app.admission import init_admission
+from app.commands import register_commands
 from app.extensions import db, migrate
+from app.graph_cache import init_story_cache
+from app.instrumentation import init_sql_instrumentation
+from app.json_provider import init_json
+from app.metrics import init_metrics
+from app.profiling import init_profiling
+from app.routing import configure_read_engine
+from app.sqlite import configure_sqlite_engine, init_sqlite_pragmas
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
 
+    init_json(app)
+    configure_sqlite_engine(app)
+    configure_read_engine(app)
     db.init_app(app)
+    init_sqlite_pragmas(app)
     migrate.init_app(app, db)
+    init_story_cache(app)
+    init_sql_instrumentation(app)
+    init_metrics(app)
+    init_admission(app)
+    init_profiling(app)
+    register_commands(app)
 
 
     # register blueprints
     from app.routes.stories import bp as stories_bp
     from app.routes.pages import bp as pages_bp
+    from app.routes.search import bp as search_bp
+    from app.routes.changes import bp as changes_bp
 
     app.register_blueprint(stories_bp)
     app.register_blueprint(pages_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(changes_bp)
 
     # optional healthcheck
     try:
@@ -25,4 +50,7 @@ def create_app():
     except Exception:
         pass
 
+    from app.metrics import bp as metrics_bp
+    app.register_blueprint(metrics_bp)
+
     return app
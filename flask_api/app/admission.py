@@ -0,0 +1,140 @@
+# flask_api/app/admission.py
+"""Admission control: bounded concurrency per route class, with priorities.
+
+Requests fall into three classes, highest priority first:
+
+- gameplay: reading a page or a story's start page,
+- read: every other read (listing, search, graphs, analysis),
+- write: anything that is not GET/HEAD/OPTIONS (the API-key routes).
+
+All classes share ADMISSION_MAX_CONCURRENT slots per process, of which
+ADMISSION_GAMEPLAY_RESERVE are held back for gameplay: read and write
+together never take more than the rest, and each is further capped by
+its own limit. While a higher class is waiting a lower class is not
+admitted. A request that cannot get a slot waits up to
+ADMISSION_QUEUE_TIMEOUT seconds in a queue of ADMISSION_QUEUE_SIZE per
+class, and otherwise gets 503 with Retry-After right away. ADMISSION_MAX_CONCURRENT=0 turns it all off.
+"""
+import math
+import threading
+
+from flask import g, jsonify, request
+
+GAMEPLAY = "gameplay"
+READ = "read"
+WRITE = "write"
+PRIORITY = (GAMEPLAY, READ, WRITE)
+
+GAMEPLAY_ENDPOINTS = {"pages.get_page", "stories.get_start_page"}
+EXEMPT_BLUEPRINTS = {"health", "metrics"}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def route_class():
+    """The class of the current request, or None when it is never limited."""
+    if request.blueprint in EXEMPT_BLUEPRINTS or request.endpoint == "static":
+        return None
+    if request.method not in READ_METHODS:
+        return WRITE
+    if request.endpoint in GAMEPLAY_ENDPOINTS:
+        return GAMEPLAY
+    return READ
+
+
+class AdmissionController:
+    def __init__(self, capacity, limits, queue_size, timeout, reserved=0):
+        self.capacity = capacity
+        # keep at least one slot for read and write
+        self.reserved = max(0, min(reserved, capacity - 1))
+        self.limits = {}
+        for cls in PRIORITY:
+            pool = capacity if cls == GAMEPLAY else capacity - self.reserved
+            self.limits[cls] = min(limits.get(cls) or pool, pool)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.running = dict.fromkeys(PRIORITY, 0)
+        self.waiting = dict.fromkeys(PRIORITY, 0)
+        self.admitted = dict.fromkeys(PRIORITY, 0)
+        self.rejected = dict.fromkeys(PRIORITY, 0)
+        self._cond = threading.Condition()
+
+    def _can_run(self, cls):
+        if sum(self.running.values()) >= self.capacity or self.running[cls] >= self.limits[cls]:
+            return False
+        if cls != GAMEPLAY and self.running[READ] + self.running[WRITE] >= self.capacity - self.reserved:
+            return False
+        # a free slot goes to the most important waiter first
+        return not any(self.waiting[higher] for higher in PRIORITY[:PRIORITY.index(cls)])
+
+    def acquire(self, cls):
+        """Take a slot for `cls`, waiting in its queue if needed; False if shed."""
+        with self._cond:
+            if not self._can_run(cls):
+                if self.waiting[cls] >= self.queue_size or self.timeout <= 0:
+                    self.rejected[cls] += 1
+                    return False
+                self.waiting[cls] += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self._can_run(cls), self.timeout)
+                finally:
+                    self.waiting[cls] -= 1
+                    # lower classes may have been held back by this waiter
+                    self._cond.notify_all()
+                if not admitted:
+                    self.rejected[cls] += 1
+                    return False
+            self.running[cls] += 1
+            self.admitted[cls] += 1
+            return True
+
+    def release(self, cls):
+        with self._cond:
+            self.running[cls] -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "reserved": self.reserved,
+                "limits": dict(self.limits),
+                "running": dict(self.running),
+                "waiting": dict(self.waiting),
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected),
+            }
+
+
+def init_admission(app):
+    capacity = app.config["ADMISSION_MAX_CONCURRENT"]
+    if capacity <= 0:
+        return
+
+    controller = AdmissionController(
+        capacity,
+        {READ: app.config["ADMISSION_READ_LIMIT"], WRITE: app.config["ADMISSION_WRITE_LIMIT"]},
+        app.config["ADMISSION_QUEUE_SIZE"],
+        app.config["ADMISSION_QUEUE_TIMEOUT"],
+        app.config["ADMISSION_GAMEPLAY_RESERVE"],
+    )
+    app.extensions["admission"] = controller
+    retry_after = str(max(1, math.ceil(app.config["ADMISSION_RETRY_AFTER"])))
+
+    @app.before_request
+    def admit_request():
+        cls = route_class()
+        if cls is None:
+            return None
+        if not controller.acquire(cls):
+            resp = jsonify({"error": "Server is busy, retry later"})
+            resp.status_code = 503
+            resp.headers["Retry-After"] = retry_after
+            return resp
+        g.admission_class = cls
+        return None
+
+    @app.teardown_request
+    def release_slot(exc):
+        cls = g.pop("admission_class", None)
+        if cls is not None:
+            controller.release(cls)
@@ -0,0 +1,119 @@
+# flask_api/app/analysis.py
+"""Structural checks over a story's page/choice graph, linear in its size."""
+from collections import defaultdict, deque
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Page, Choice
+
+
+def load_graph_rows(story_id):
+    """(page id, is_ending) and (choice id, page id, next page id) tuples of a story."""
+    pages = db.session.execute(
+        select(Page.id, Page.is_ending).where(Page.story_id == story_id).order_by(Page.id)
+    ).all()
+    choices = db.session.execute(
+        select(Choice.id, Choice.page_id, Choice.next_page_id)
+        .join(Page, Choice.page_id == Page.id)
+        .where(Page.story_id == story_id)
+        .order_by(Choice.id)
+    ).all()
+    return pages, choices
+
+
+def _walk(roots, edges):
+    seen = set(roots)
+    queue = deque(roots)
+    while queue:
+        node = queue.popleft()
+        for nxt in edges.get(node, ()):
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+    return seen
+
+
+def strongly_connected_components(nodes, edges):
+    """Iterative Tarjan; yields each component as a list of nodes."""
+    index, low, on_stack = {}, {}, set()
+    stack, counter = [], 0
+
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(edges.get(root, ())))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(edges.get(child, ()))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    yield component
+
+
+def analyze_graph(start_page_id, pages, choices):
+    """Find unreachable pages, dead ends, cross-story choices and trapped cycles.
+
+    `pages` are (id, is_ending) pairs and `choices` (id, page_id, next_page_id)
+    triples, as returned by load_graph_rows().
+    """
+    page_ids = [p[0] for p in pages]
+    known = set(page_ids)
+    endings = [pid for pid, is_ending in pages if is_ending]
+
+    edges, reverse = defaultdict(list), defaultdict(list)
+    has_choices, cross_story = set(), []
+    for choice_id, page_id, next_page_id in choices:
+        has_choices.add(page_id)
+        if next_page_id not in known:
+            cross_story.append({"id": choice_id, "page_id": page_id, "next_page_id": next_page_id})
+            continue
+        edges[page_id].append(next_page_id)
+        reverse[next_page_id].append(page_id)
+
+    reachable = _walk([start_page_id], edges) if start_page_id in known else set()
+    can_finish = _walk(endings, reverse)
+
+    trapped_cycles = []
+    for component in strongly_connected_components(page_ids, edges):
+        node = component[0]
+        cyclic = len(component) > 1 or node in edges.get(node, ())
+        if cyclic and node not in can_finish:
+            trapped_cycles.append(sorted(component))
+
+    return {
+        "start_page_id": start_page_id,
+        "page_count": len(page_ids),
+        "choice_count": len(choices),
+        "ending_count": len(endings),
+        "unreachable_pages": [pid for pid in page_ids if pid not in reachable],
+        "dead_ends": [pid for pid, is_ending in pages if not is_ending and pid not in has_choices],
+        "cross_story_choices": cross_story,
+        "trapped_cycles": sorted(trapped_cycles),
+        "cannot_finish": [pid for pid in page_ids if pid in reachable and pid not in can_finish],
+    }
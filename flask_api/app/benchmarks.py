@@ -0,0 +1,96 @@
+# flask_api/app/benchmarks.py
+"""Mixed read/write SQLite benchmark comparing engine profiles."""
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import Story, Page, Choice
+from app.sqlite import profile_engine
+
+
+def _seed(engine, pages):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        story_id = conn.execute(
+            insert(Story).values(title="bench", status="published", created_at=now, updated_at=now)
+        ).inserted_primary_key[0]
+        conn.execute(insert(Page), [
+            {"story_id": story_id, "text": "x" * 400, "is_ending": False, "created_at": now, "updated_at": now}
+            for _ in range(pages)
+        ])
+        page_ids = conn.scalars(select(Page.id).where(Page.story_id == story_id)).all()
+        conn.execute(insert(Choice), [
+            {"page_id": pid, "next_page_id": page_ids[(i + 1) % len(page_ids)], "text": "next", "created_at": now}
+            for i, pid in enumerate(page_ids)
+        ])
+    return story_id, page_ids
+
+
+def _read(conn, story_id, page_ids, i):
+    page_id = page_ids[i % len(page_ids)]
+    conn.execute(
+        select(Page, Choice.id, Choice.text, Choice.next_page_id)
+        .outerjoin(Choice, Choice.page_id == Page.id)
+        .where(Page.id == page_id)
+    ).all()
+
+
+def _write(conn, story_id, page_ids, i):
+    now = datetime.utcnow()
+    with conn.begin():
+        page_id = conn.execute(
+            insert(Page).values(story_id=story_id, text="y" * 400, is_ending=False, created_at=now, updated_at=now)
+        ).inserted_primary_key[0]
+        conn.execute(insert(Choice).values(page_id=page_ids[0], next_page_id=page_id, text="new", created_at=now))
+        conn.execute(update(Story).where(Story.id == story_id).values(version=Story.version + 1, updated_at=now))
+
+
+def run_profile(profile, seconds, readers, writers, pages):
+    tmp = tempfile.mkdtemp(prefix="nahb-bench-")
+    engine = profile_engine("sqlite:///" + os.path.join(tmp, "bench.sqlite3"), profile)
+    db.metadata.create_all(engine)
+    story_id, page_ids = _seed(engine, pages)
+
+    stats = {"read": [], "write": [], "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(op, kind, offset):
+        latencies, errors, i = [], 0, offset
+        with engine.connect() as conn:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    op(conn, story_id, page_ids, i)
+                    conn.commit()
+                    latencies.append(time.perf_counter() - start)
+                except OperationalError:
+                    conn.rollback()
+                    errors += 1
+                i += 1
+        with lock:
+            stats[kind] += latencies
+            stats["errors"] += errors
+
+    threads = [threading.Thread(target=worker, args=(_read, "read", n * 7919)) for n in range(readers)]
+    threads += [threading.Thread(target=worker, args=(_write, "write", n)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    result = {"profile": profile, "errors": stats["errors"]}
+    for kind in ("read", "write"):
+        lat = sorted(stats[kind])
+        result[f"{kind}_ops_per_s"] = len(lat) / seconds
+        result[f"{kind}_p50_ms"] = statistics.median(lat) * 1000 if lat else None
+        result[f"{kind}_p99_ms"] = lat[int(len(lat) * 0.99) - 1] * 1000 if lat else None
+    return result
@@ -0,0 +1,50 @@
+# flask_api/app/changes.py
+"""Change log behind GET /changes.
+
+Every writer records the stories and pages it touched in the same
+transaction as the write, so a row is visible exactly when the change is.
+"""
+from datetime import datetime
+
+from sqlalchemy import Select, insert, literal, select
+
+from app.extensions import db
+from app.models import ChangeLog
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+def record_change(story_id, action=UPDATED, page_ids=None):
+    """Log a change to a story, or to some of its pages.
+
+    `page_ids` is a list of ids or a SELECT of page ids, which is copied
+    with INSERT ... SELECT so large stories never pass through Python.
+    """
+    now = datetime.utcnow()
+    if page_ids is None:
+        db.session.execute(insert(ChangeLog).values(story_id=story_id, action=action, created_at=now))
+    elif isinstance(page_ids, Select):
+        subquery = page_ids.subquery()
+        page_id = subquery.c[0]
+        db.session.execute(
+            insert(ChangeLog).from_select(
+                ["story_id", "page_id", "action", "created_at"],
+                select(literal(story_id), page_id, literal(action), literal(now)).order_by(page_id),
+            )
+        )
+    elif page_ids:
+        db.session.execute(
+            insert(ChangeLog),
+            [
+                {"story_id": story_id, "page_id": page_id, "action": action, "created_at": now}
+                for page_id in page_ids
+            ],
+        )
+
+
+def changes_since(cursor, limit):
+    return db.session.scalars(
+        select(ChangeLog).where(ChangeLog.id > cursor).order_by(ChangeLog.id).limit(limit)
+    ).all()
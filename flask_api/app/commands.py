@@ -0,0 +1,93 @@
+# flask_api/app/commands.py
+import click
+
+
+def register_commands(app):
+    @app.cli.command("check-query-plans")
+    @click.option("--verbose", is_flag=True, help="Print every plan, not only failures.")
+    def check_query_plans_command(verbose):
+        """Fail if a hot route's SQL falls back to a full table scan."""
+        from app import create_app
+        from app.queryplan import check_query_plans
+
+        report, failures = check_query_plans(create_app)
+        if verbose:
+            click.echo("\n".join(report))
+
+        for route, detail, statement in failures:
+            click.echo(f"{route}: {detail}\n    {statement}", err=True)
+        if failures:
+            raise SystemExit(1)
+        click.echo("query plans ok")
+
+    @app.cli.command("sqlite-bench")
+    @click.option("--seconds", default=5.0, show_default=True)
+    @click.option("--readers", default=8, show_default=True)
+    @click.option("--writers", default=2, show_default=True)
+    @click.option("--pages", default=500, show_default=True, help="Pages in the seeded story.")
+    @click.option("--profiles", default="default,production", show_default=True)
+    def sqlite_bench_command(seconds, readers, writers, pages, profiles):
+        """Compare SQLite engine profiles under a mixed read/write load."""
+        from app.benchmarks import run_profile
+
+        def fmt(value):
+            return "-" if value is None else f"{value:.2f}"
+
+        click.echo(f"{'profile':<12}{'reads/s':>10}{'p50 ms':>9}{'p99 ms':>9}"
+                   f"{'writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for profile in profiles.split(","):
+            r = run_profile(profile.strip(), seconds, readers, writers, pages)
+            click.echo(
+                f"{r['profile']:<12}{r['read_ops_per_s']:>10.0f}{fmt(r['read_p50_ms']):>9}{fmt(r['read_p99_ms']):>9}"
+                f"{r['write_ops_per_s']:>10.0f}{fmt(r['write_p50_ms']):>9}{fmt(r['write_p99_ms']):>9}{r['errors']:>8}"
+            )
+
+    @app.cli.command("search-index")
+    def search_index_command():
+        """Create the FTS5 search index if missing and rebuild it from the tables."""
+        from app.extensions import db
+        from app.search import rebuild_search_index
+
+        with db.engine.begin() as connection:
+            rebuild_search_index(connection)
+        click.echo("search index rebuilt")
+
+    @app.cli.command("generate-story")
+    @click.option("--pages", default=500, show_default=True)
+    @click.option("--branching", default=3, show_default=True, help="Choices per non-ending page.")
+    @click.option("--text-length", default=400, show_default=True)
+    @click.option("--cycle-density", default=0.1, show_default=True, help="Share of pages with a back link.")
+    @click.option("--endings", default=5, show_default=True)
+    @click.option("--count", default=1, show_default=True, help="Number of stories to create.")
+    @click.option("--status", default="published", show_default=True)
+    @click.option("--seed", type=int)
+    def generate_story_command(pages, branching, text_length, cycle_density, endings, count, status, seed):
+        """Create synthetic stories of a given size and shape."""
+        from app.extensions import db
+        from app.models import Story
+        from app.story_graph import apply_story_graph
+        from app.synthetic import generate_story_graph
+
+        for n in range(count):
+            story = Story(title=f"Synthetic story ({pages} pages)", description="generated", status=status)
+            db.session.add(story)
+            db.session.flush()
+            graph = generate_story_graph(pages, branching, text_length, cycle_density, endings,
+                                         None if seed is None else seed + n)
+            result = apply_story_graph(story.id, graph)
+            db.session.commit()
+            click.echo(f"story {story.id}: {len(result['pages'])} pages, {len(result['choices'])} choices")
+
+    @app.cli.command("loadtest")
+    @click.option("--url", default="http://127.0.0.1:5001", show_default=True)
+    @click.option("--story-id", type=int, required=True)
+    @click.option("--duration", default=30.0, show_default=True)
+    @click.option("--concurrency", default=8, show_default=True)
+    @click.option("--mix", default=None, help="Weights, e.g. page=60,start=20,list=10,create_page=5,create_choice=5")
+    @click.option("--seed", type=int)
+    def loadtest_command(url, story_id, duration, concurrency, mix, seed):
+        """Replay a read/write mix against a running API and report p50/p95/p99."""
+        from app.loadtest import DEFAULT_MIX, format_report, run
+
+        report = run(url, story_id, app.config["API_KEY"], duration, concurrency, mix or DEFAULT_MIX, seed)
+        click.echo(format_report(report))
@@ -0,0 +1,50 @@
+# flask_api/app/conditional.py
+import hashlib
+from datetime import timezone
+
+from flask import request, jsonify, make_response
+
+
+def make_etag(*parts):
+    return "-".join(str(p) for p in parts)
+
+
+def hashed_etag(*parts):
+    return hashlib.sha1(make_etag(*parts).encode()).hexdigest()[:20]
+
+
+def _http_date(value):
+    # stored timestamps are naive UTC; HTTP dates have second precision
+    if value is None:
+        return None
+    return value.replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def set_validators(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _http_date(last_modified)
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    """Return a 304 response if the request's validators still match, else None."""
+    if request.if_none_match:
+        matched = request.if_none_match.contains(etag)
+    elif last_modified is not None and request.if_modified_since:
+        matched = _http_date(last_modified) <= request.if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+
+    return set_validators(make_response("", 304), etag, last_modified)
+
+
+def conditional_json(etag, last_modified, build):
+    """304 if the client's copy is current, else jsonify(build()) with validators."""
+    r = not_modified(etag, last_modified)
+    if r:
+        return r
+    return set_validators(jsonify(build()), etag, last_modified)
@@ -4,4 +4,62 @@ import os
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///nahb.sqlite3")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # optional engine for GET requests, e.g. a read-only connection to the
+    # same file: sqlite:///file:/path/nahb.sqlite3?mode=ro&uri=true
+    SQLALCHEMY_READ_DATABASE_URI = os.getenv("READ_DATABASE_URL")
     API_KEY = os.getenv("API_KEY", "dev-key")
+
+    # memory bound for the in-process published story cache, 0 disables it
+    STORY_CACHE_MAX_BYTES = int(os.getenv("STORY_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    # how long a worker serves a cached story before re-checking its version
+    STORY_CACHE_REVALIDATE_SECONDS = float(os.getenv("STORY_CACHE_REVALIDATE_SECONDS", 5))
+    # memory bound for per-version derived results (graph analysis)
+    STORY_VERSION_CACHE_MAX_BYTES = int(os.getenv("STORY_VERSION_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+
+    # GET /stories keyset pagination
+    STORIES_PAGE_SIZE = int(os.getenv("STORIES_PAGE_SIZE", 50))
+    STORIES_MAX_PAGE_SIZE = int(os.getenv("STORIES_MAX_PAGE_SIZE", 200))
+    # ids accepted by GET /pages?ids=
+    PAGES_MULTIGET_MAX = int(os.getenv("PAGES_MULTIGET_MAX", 100))
+    # choices accepted by one POST /pages/<id>/choices array
+    CHOICES_BATCH_MAX = int(os.getenv("CHOICES_BATCH_MAX", 100))
+    # GET /search pagination
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 20))
+    SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", 100))
+    # GET /changes pagination
+    CHANGES_PAGE_SIZE = int(os.getenv("CHANGES_PAGE_SIZE", 500))
+    CHANGES_MAX_PAGE_SIZE = int(os.getenv("CHANGES_MAX_PAGE_SIZE", 2000))
+
+    # per-request SQL instrumentation (X-Query-Count / Server-Timing headers)
+    SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "0") == "1"
+    SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", 10))
+    SQL_TIME_BUDGET_MS = float(os.getenv("SQL_TIME_BUDGET_MS", 100))
+
+    # published story snapshots; defaults to <instance>/snapshots
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+    # let the front web server stream snapshot files (X-Sendfile)
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "0") == "1"
+
+    # response encoder: "auto" (orjson when installed), "orjson" or "json"
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+
+    # SQLite engine profile from app/sqlite.py: "default" or "production"
+    SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+
+    # shared directory for multi-process /metrics; unset keeps them in-process
+    METRICS_DIR = os.getenv("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1.0))
+
+    # admission control per process (app/admission.py); 0 disables it
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", 0))
+    # slots only gameplay reads may take; read and write share the rest
+    ADMISSION_GAMEPLAY_RESERVE = int(os.getenv("ADMISSION_GAMEPLAY_RESERVE", 1))
+    ADMISSION_READ_LIMIT = int(os.getenv("ADMISSION_READ_LIMIT", 0))
+    ADMISSION_WRITE_LIMIT = int(os.getenv("ADMISSION_WRITE_LIMIT", 2))
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 32))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 2.0))
+    ADMISSION_RETRY_AFTER = float(os.getenv("ADMISSION_RETRY_AFTER", 1))
+
+    # on-demand profiling: send X-Profile: <API_KEY>, or sample a fraction
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
+    PROFILE_DIR = os.getenv("PROFILE_DIR")
@@ -0,0 +1,191 @@
+# flask_api/app/ending_odds.py
+"""Ending probabilities of a story under uniform random play.
+
+Each page is a state of a Markov chain; every choice on a page is taken
+with equal probability. Endings are absorbing, and so are the ways a
+playthrough can stop without one: a dead end (no choices), a choice into
+another story, or entering a trapped region from which no stop is
+reachable. The remaining pages are transient and are solved as an
+absorbing chain: with scipy installed via sparse GMRES (branching stories
+fill in badly under a direct LU, which is kept only as a fallback),
+otherwise by iterating the distribution of the playthrough until it has
+drained.
+"""
+from collections import defaultdict
+
+from app.analysis import _walk
+
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.sparse.linalg import gmres, splu
+except ImportError:  # pragma: no cover - optional dependency
+    sparse = None
+
+DEAD_END = "dead_end"
+LEFT_STORY = "left_story"
+TRAPPED = "trapped"
+OUTCOMES = (DEAD_END, LEFT_STORY, TRAPPED)
+
+TOLERANCE = 1e-12
+MAX_ITERATIONS = 10_000
+
+
+def _chain(start_page_id, pages, choices):
+    """Transient states with their transitions, and absorbing columns.
+
+    Returns (transient ids, {page: [(transient page, p)]},
+    {page: {outcome or ending id: p}}).
+    """
+    known = {pid for pid, _ in pages}
+    endings = {pid for pid, is_ending in pages if is_ending}
+
+    out = defaultdict(list)
+    for _, page_id, next_page_id in choices:
+        out[page_id].append(next_page_id)
+
+    # pages that can stop somehow; the rest only ever cycle among themselves
+    stops = {pid for pid in known if pid in endings or any(n not in known for n in out[pid]) or not out[pid]}
+    reverse = defaultdict(list)
+    for page_id, targets in out.items():
+        for target in targets:
+            if target in known:
+                reverse[target].append(page_id)
+    can_stop = _walk(list(stops), reverse)
+
+    # play stops at an ending, so nothing past one is reached through it
+    play = {pid: targets for pid, targets in out.items() if pid not in endings}
+    transient = [pid for pid in sorted(_walk([start_page_id], play) & known)
+                 if pid not in endings and pid in can_stop]
+    is_transient = set(transient)
+
+    moves, absorb = defaultdict(list), defaultdict(lambda: defaultdict(float))
+    for pid in transient:
+        targets = out[pid]
+        if not targets:
+            absorb[pid][DEAD_END] = 1.0
+            continue
+        p = 1.0 / len(targets)
+        for target in targets:
+            if target in is_transient:
+                moves[pid].append((target, p))
+            elif target in endings:
+                absorb[pid][target] += p
+            elif target not in known:
+                absorb[pid][LEFT_STORY] += p
+            else:
+                absorb[pid][TRAPPED] += p
+    return transient, moves, absorb
+
+
+def _sparse_solve(a, b):
+    options = {"atol": 0.0, "restart": 50, "maxiter": MAX_ITERATIONS}
+    try:
+        x, info = gmres(a, b, rtol=TOLERANCE, **options)
+    except TypeError:  # scipy < 1.12 calls it tol
+        x, info = gmres(a, b, tol=TOLERANCE, **options)
+    if info != 0:
+        x = splu(a.tocsc()).solve(b)
+    return x
+
+
+def _solve_sparse(start_page_id, transient, moves, absorb, columns):
+    index = {pid: i for i, pid in enumerate(transient)}
+    n, col = len(transient), {c: j for j, c in enumerate(columns)}
+
+    rows, cols, data = [], [], []
+    for pid, targets in moves.items():
+        for target, p in targets:
+            rows.append(index[pid])
+            cols.append(index[target])
+            data.append(p)
+    q = sparse.csr_matrix((data, (rows, cols)), shape=(n, n))
+    r = np.zeros((n, len(columns)))
+    for pid, probs in absorb.items():
+        for c, p in probs.items():
+            r[index[pid], col[c]] += p
+
+    a = (sparse.identity(n, format="csr") - q).tocsr()
+    start = np.zeros(n)
+    start[index[start_page_id]] = 1.0
+    visits = _sparse_solve(a.T.tocsr(), start)  # expected visits per page
+    absorbed = visits @ r
+
+    ending_cols = [col[c] for c in columns if c not in OUTCOMES]
+    finish = _sparse_solve(a, r[:, ending_cols].sum(axis=1)) if ending_cols else np.zeros(n)
+    absorbed = {c: float(absorbed[col[c]]) for c in columns}
+    return (
+        absorbed,
+        # a dead end is visited once, with probability absorbed[DEAD_END], and makes no choice
+        float(visits.sum()) - absorbed[DEAD_END],
+        float(visits @ finish),  # E[steps, counted only for playthroughs that end]
+        0.0,
+    )
+
+
+def _solve_iterative(start_page_id, transient, moves, absorb, columns):
+    absorbed = dict.fromkeys(columns, 0.0)
+    steps = steps_to_ending = 0.0
+    dist = {start_page_id: 1.0}
+
+    for step in range(1, MAX_ITERATIONS + 1):
+        nxt = defaultdict(float)
+        for pid, mass in dist.items():
+            for c, p in absorb.get(pid, {}).items():
+                absorbed[c] += mass * p
+                # `step` choices were made to get here; a dead end makes no further one
+                taken = step - 1 if c == DEAD_END else step
+                steps += taken * mass * p
+                if c not in OUTCOMES:
+                    steps_to_ending += taken * mass * p
+            for target, p in moves.get(pid, ()):
+                nxt[target] += mass * p
+        dist = nxt
+        if sum(dist.values()) < TOLERANCE:
+            break
+    return absorbed, steps, steps_to_ending, float(sum(dist.values()))
+
+
+def ending_odds(start_page_id, pages, choices):
+    """Probability of each ending, the other ways play can stop, and the
+    expected number of choices made.
+
+    `pages` and `choices` are the rows of analysis.load_graph_rows().
+    Returns None when the start page is not one of `pages`.
+    """
+    if start_page_id not in {pid for pid, _ in pages}:
+        return None
+    endings = [pid for pid, is_ending in pages if is_ending]
+    columns = endings + list(OUTCOMES)
+
+    if start_page_id in endings:
+        absorbed, steps, steps_to_ending, unresolved, method = (
+            {**dict.fromkeys(columns, 0.0), start_page_id: 1.0}, 0.0, 0.0, 0.0, "direct")
+    else:
+        transient, moves, absorb = _chain(start_page_id, pages, choices)
+        if start_page_id not in transient:
+            # the start page itself sits in a trapped cycle
+            absorbed = {**dict.fromkeys(columns, 0.0), TRAPPED: 1.0}
+            steps, steps_to_ending, unresolved, method = 0.0, 0.0, 0.0, "direct"
+        elif sparse is not None:
+            absorbed, steps, steps_to_ending, unresolved = _solve_sparse(
+                start_page_id, transient, moves, absorb, columns)
+            method = "sparse-gmres"
+        else:
+            absorbed, steps, steps_to_ending, unresolved = _solve_iterative(
+                start_page_id, transient, moves, absorb, columns)
+            method = "power-iteration"
+
+    finished = sum(absorbed[pid] for pid in endings)
+    return {
+        "start_page_id": start_page_id,
+        "endings": [{"page_id": pid, "probability": absorbed[pid]} for pid in endings],
+        "ending_probability": finished,
+        "dead_end_probability": absorbed[DEAD_END],
+        "left_story_probability": absorbed[LEFT_STORY],
+        "trapped_probability": absorbed[TRAPPED],
+        "unresolved_probability": unresolved,
+        "expected_steps": steps,
+        "expected_steps_to_ending": steps_to_ending / finished if finished else None,
+        "method": method,
+    }
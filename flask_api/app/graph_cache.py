@@ -0,0 +1,249 @@
+# flask_api/app/graph_cache.py
+"""In-process cache of compiled published story graphs.
+
+Entries are evicted by the write routes of this process. Other worker
+processes never see that eviction; instead, a cached story that has not been
+checked for STORY_CACHE_REVALIDATE_SECONDS has its version looked up again
+(one primary-key read) before it is served, so they serve a story that was
+changed elsewhere for at most that long.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Story, StoryStatus
+from app.story_graph import fetch_story_graph, load_pages
+
+
+class LRUCache:
+    """LRU mapping bounded by the approximate size of its values in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._items = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if size > self.max_bytes:
+                return False
+            self._discard(key)
+            self._items[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._items)))
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._discard(key):
+                self.invalidations += 1
+
+    def invalidate_matching(self, predicate):
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                self._discard(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._items):
+                self._discard(key)
+
+    def _discard(self, key):
+        item = self._items.pop(key, None)
+        if item is None:
+            return False
+        self.size -= item[1]
+        self._on_discard(key, item[0])
+        return True
+
+    def _on_discard(self, key, value):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class StoryGraphCache(LRUCache):
+    """Compiled pages and choices of published stories, keyed by story id."""
+
+    def __init__(self, max_bytes, revalidate_after=5.0):
+        super().__init__(max_bytes)
+        self.revalidate_after = revalidate_after
+        self.revalidations = 0
+        self._page_index = {}
+        self._generations = {}
+        self._oversized = {}
+        self._checked = {}
+
+    def get(self, story_id):
+        entry = super().get(story_id)
+        if entry is None:
+            return None
+        with self._lock:
+            checked = self._checked.get(story_id, 0.0)
+        if time.monotonic() - checked < self.revalidate_after:
+            return entry
+        return entry if self._revalidate(story_id, entry) else None
+
+    def _revalidate(self, story_id, entry):
+        """Keep the entry if the story is still published at the cached version."""
+        self.revalidations += 1
+        row = db.session.execute(
+            select(Story.version, Story.status).where(Story.id == story_id)
+        ).first()
+        if row is not None and row.version == entry["version"] and row.status == StoryStatus.published.value:
+            with self._lock:
+                self._checked[story_id] = time.monotonic()
+            return True
+        self.invalidate(story_id)
+        return False
+
+    def wants(self, story_id, version):
+        """Whether loading this story version could end up in the cache."""
+        return self.max_bytes > 0 and self._oversized.get(story_id) != version
+
+    def get_page(self, page_id):
+        with self._lock:
+            story_id = self._page_index.get(page_id)
+            if story_id is None:
+                self.misses += 1
+                return None
+        entry = self.get(story_id)
+        if entry is None or page_id not in entry["pages"]:
+            return None
+        return entry, entry["pages"][page_id]
+
+    def load(self, story_id):
+        """Compile the story from the database and cache it if it is published."""
+        with self._lock:
+            generation = self._generations.get(story_id, 0)
+
+        entry = compile_story(story_id)
+        if entry is None or entry["status"] != StoryStatus.published.value:
+            return entry
+
+        with self._lock:
+            # a write evicted the story while we were reading it
+            if self._generations.get(story_id, 0) == generation:
+                if self.put(story_id, entry, entry["size"]):
+                    self._checked[story_id] = time.monotonic()
+                    for page_id in entry["pages"]:
+                        self._page_index[page_id] = story_id
+                else:
+                    self._oversized[story_id] = entry["version"]
+        return entry
+
+    def invalidate(self, story_id):
+        with self._lock:
+            self._generations[story_id] = self._generations.get(story_id, 0) + 1
+            self._oversized.pop(story_id, None)
+            super().invalidate(story_id)
+
+    def stats(self):
+        return {**super().stats(), "revalidations": self.revalidations}
+
+    def _on_discard(self, story_id, entry):
+        self._checked.pop(story_id, None)
+        for page_id in entry["pages"]:
+            if self._page_index.get(page_id) == story_id:
+                del self._page_index[page_id]
+
+
+def compile_story(story_id):
+    graph = fetch_story_graph(story_id)
+    if graph is None:
+        return None
+    story, pages, choices = graph
+
+    compiled = {
+        p.id: {"page": p.to_dict(), "choices": [], "updated_at": p.updated_at}
+        for p in pages
+    }
+    for c in choices:
+        compiled[c.page_id]["choices"].append(c.to_dict())
+
+    size = len(json.dumps([v["page"] for v in compiled.values()]))
+    size += len(json.dumps([c.to_dict() for c in choices]))
+
+    return {
+        "story_id": story.id,
+        "status": story.status,
+        "version": story.version,
+        "updated_at": story.updated_at,
+        "start_page_id": story.start_page_id,
+        "pages": compiled,
+        "size": size,
+    }
+
+
+def wants_next_pages():
+    return "next" in request.args.get("include", "").split(",")
+
+
+def expand_next_pages(choices, entry=None):
+    """The distinct target pages of `choices` with their own choices.
+
+    Targets found in the compiled `entry` are used as is; the rest (another
+    story, or no entry at all) are fetched in one batch.
+    """
+    next_ids = list(dict.fromkeys(c["next_page_id"] for c in choices))
+    found = {}
+    if entry is not None:
+        for page_id in next_ids:
+            cached = entry["pages"].get(page_id)
+            if cached is not None:
+                found[page_id] = {"page": cached["page"], "choices": cached["choices"]}
+
+    rest = [page_id for page_id in next_ids if page_id not in found]
+    if rest:
+        found.update(load_pages(rest))
+    return [found[page_id] for page_id in next_ids if page_id in found]
+
+
+def init_story_cache(app):
+    app.extensions["story_cache"] = StoryGraphCache(
+        app.config["STORY_CACHE_MAX_BYTES"], app.config["STORY_CACHE_REVALIDATE_SECONDS"]
+    )
+    # derived results keyed by (kind, story_id, version); a write bumps the
+    # version, so stale entries are never read and simply age out
+    app.extensions["story_version_cache"] = LRUCache(app.config["STORY_VERSION_CACHE_MAX_BYTES"])
+
+
+def get_story_cache():
+    return current_app.extensions["story_cache"]
+
+
+def get_version_cache():
+    return current_app.extensions["story_version_cache"]
@@ -1,7 +1,20 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
+
+from app.graph_cache import get_story_cache
 
 bp = Blueprint("health", __name__)
 
 @bp.get("/health")
 def health():
     return jsonify(status="ok")
+
+
+@bp.get("/health/cache")
+def cache_stats():
+    return jsonify(get_story_cache().stats())
+
+
+@bp.get("/health/admission")
+def admission_stats():
+    controller = current_app.extensions.get("admission")
+    return jsonify(controller.stats() if controller else {"enabled": False})
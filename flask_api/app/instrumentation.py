@@ -0,0 +1,60 @@
+# flask_api/app/instrumentation.py
+"""Per-request SQL statement counting and timing.
+
+Enabled with SQL_INSTRUMENTATION=1. Every response then carries
+X-Query-Count and a Server-Timing header, and requests that go over
+SQL_QUERY_BUDGET statements or SQL_TIME_BUDGET_MS of database time are
+logged as warnings.
+"""
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if has_request_context() and "sql_count" in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+
+
+def init_sql_instrumentation(app):
+    if not app.config["SQL_INSTRUMENTATION"]:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def report_sql_stats(response):
+        if "sql_count" not in g:
+            return response
+
+        db_ms = g.sql_time * 1000
+        total_ms = (time.perf_counter() - g.request_start) * 1000
+        response.headers["X-Query-Count"] = str(g.sql_count)
+        response.headers.add(
+            "Server-Timing", f'db;dur={db_ms:.2f};desc="{g.sql_count} queries", total;dur={total_ms:.2f}'
+        )
+
+        if g.sql_count > app.config["SQL_QUERY_BUDGET"] or db_ms > app.config["SQL_TIME_BUDGET_MS"]:
+            app.logger.warning(
+                "%s %s ran %d queries in %.1f ms of db time (%.1f ms total)",
+                request.method, request.full_path.rstrip("?"), g.sql_count, db_ms, total_ms,
+            )
+        return response
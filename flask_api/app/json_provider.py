@@ -0,0 +1,65 @@
+# flask_api/app/json_provider.py
+"""app.json: orjson when it is installed, the stdlib encoder otherwise.
+
+Both encode the same values as Flask's DefaultJSONProvider (sorted keys,
+HTTP dates for datetimes), so clients decode identical data and ETags,
+which come from story versions, do not change. The bytes do: orjson
+writes non-ASCII text as raw UTF-8 where the default escapes it. Debug
+pretty-printing still goes through Flask's own encoder.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    _OPTIONS = (
+        orjson.OPT_SORT_KEYS
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    use_orjson = orjson is not None
+
+    def dumps_bytes(self, obj):
+        if self.use_orjson:
+            return orjson.dumps(obj, default=self.default, option=_OPTIONS)
+        return super().dumps(obj).encode()
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        # encode straight to bytes; skips the str round trip of jsonify()
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def rows_response(fields, rows):
+    """A JSON array of objects from plain row tuples, without ORM objects."""
+    from flask import current_app
+
+    return current_app.json.response([dict(zip(fields, row)) for row in rows])
+
+
+def init_json(app):
+    app.json = FastJSONProvider(app)
+    encoder = app.config["JSON_ENCODER"]
+    if encoder == "json":
+        app.json.use_orjson = False
+    elif encoder == "orjson" and orjson is None:
+        raise RuntimeError("JSON_ENCODER=orjson but orjson is not installed")
@@ -0,0 +1,160 @@
+# flask_api/app/loadtest.py
+"""Replay a read/write mix against a running API and report latencies.
+
+Standard library only, so it can run from any machine:
+
+    python -m app.loadtest --url http://127.0.0.1:5001 --story-id 1 --api-key dev-key
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_MIX = "page=60,start=20,list=10,create_page=5,create_choice=5"
+OPERATIONS = ("list", "page", "start", "create_page", "create_choice")
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"unknown operation {name!r}, expected one of {OPERATIONS}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class Client:
+    def __init__(self, url, api_key, timeout=10):
+        self.url = url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def call(self, method, path, data=None):
+        body = json.dumps(data).encode() if data is not None else None
+        req = urllib.request.Request(self.url + path, data=body, method=method)
+        req.add_header("Content-Type", "application/json")
+        if method != "GET":
+            req.add_header("X-API-KEY", self.api_key)
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            payload = resp.read()
+        return json.loads(payload) if payload else None
+
+
+def run(url, story_id, api_key, duration=30.0, concurrency=8, mix=DEFAULT_MIX, seed=None):
+    client = Client(url, api_key)
+    graph = client.call("GET", f"/stories/{story_id}/graph")
+    page_ids = [p["id"] for p in graph["pages"]]
+    if not page_ids:
+        raise ValueError(f"story {story_id} has no pages")
+
+    weights = parse_mix(mix) if isinstance(mix, str) else mix
+    names, cumulative = list(weights), []
+    total = 0.0
+    for name in names:
+        total += weights[name]
+        cumulative.append(total)
+
+    lock = threading.Lock()
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    deadline = time.perf_counter() + duration
+
+    def op(name, rng):
+        if name == "list":
+            client.call("GET", "/stories?status=published")
+        elif name == "page":
+            client.call("GET", f"/pages/{rng.choice(page_ids)}")
+        elif name == "start":
+            client.call("GET", f"/stories/{story_id}/start")
+        elif name == "create_page":
+            created = client.call("POST", f"/stories/{story_id}/pages", {"text": "load test page"})
+            with lock:
+                page_ids.append(created["id"])
+        elif name == "create_choice":
+            client.call("POST", f"/pages/{rng.choice(page_ids)}/choices",
+                        {"text": "load test choice", "next_page_id": rng.choice(page_ids)})
+
+    def worker(n):
+        rng = random.Random(None if seed is None else seed + n)
+        mine = {name: [] for name in names}
+        failed = {name: 0 for name in names}
+        while time.perf_counter() < deadline:
+            x = rng.random() * total
+            name = next(nm for nm, edge in zip(names, cumulative) if x < edge)
+            start = time.perf_counter()
+            try:
+                op(name, rng)
+                mine[name].append(time.perf_counter() - start)
+            except (urllib.error.URLError, OSError, ValueError):
+                failed[name] += 1
+        with lock:
+            for name in names:
+                latencies[name] += mine[name]
+                errors[name] += failed[name]
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    report = []
+    everything = []
+    for name in names + ["total"]:
+        values = sorted(everything if name == "total" else latencies[name])
+        if name != "total":
+            everything += values
+        report.append({
+            "operation": name,
+            "requests": len(values),
+            "errors": sum(errors.values()) if name == "total" else errors[name],
+            "throughput": len(values) / elapsed,
+            "p50_ms": _ms(percentile(values, 50)),
+            "p95_ms": _ms(percentile(values, 95)),
+            "p99_ms": _ms(percentile(values, 99)),
+        })
+    return report
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+def format_report(report):
+    lines = [f"{'operation':<15}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+    for r in report:
+        cells = [f"{r[k]:>9.2f}" if r[k] is not None else f"{'-':>9}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        lines.append(f"{r['operation']:<15}{r['requests']:>9}{r['errors']:>8}{r['throughput']:>9.1f}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--story-id", type=int, required=True)
+    parser.add_argument("--api-key", default="dev-key")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    print(format_report(run(args.url, args.story_id, args.api_key, args.duration,
+                            args.concurrency, args.mix, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
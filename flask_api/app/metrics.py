@@ -0,0 +1,238 @@
+# flask_api/app/metrics.py
+"""Request latency histograms, status counters and in-flight gauges.
+
+Exposed at /metrics in the Prometheus text format. With METRICS_DIR set,
+every worker process periodically writes its own numbers to
+METRICS_DIR/metrics-<pid>.json and /metrics sums all of them, so any worker
+can answer a scrape. Counters of workers that have exited are kept: a
+scrape folds them into the scraping worker's own numbers and deletes their
+files, so the directory holds one file per live worker. Their in-flight
+gauges are dropped.
+"""
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+from flask import Blueprint, Response, current_app, g, request
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+bp = Blueprint("metrics", __name__)
+
+
+class RequestMetrics:
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.histograms = {}  # (blueprint, endpoint, method) -> [*buckets, +Inf, sum]
+        self.requests = {}  # (blueprint, endpoint, method, status) -> count
+        self.in_flight = {}  # (blueprint, endpoint) -> gauge
+        self._last_flush = 0.0
+
+    def _check_fork(self):
+        # a worker forked after create_app() must not re-report the parent's numbers
+        if os.getpid() != self.pid:
+            self._reset()
+
+    def start(self, blueprint, endpoint):
+        with self._lock:
+            self._check_fork()
+            key = (blueprint, endpoint)
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def finish(self, blueprint, endpoint):
+        with self._lock:
+            self._check_fork()
+            key = (blueprint, endpoint)
+            self.in_flight[key] = max(0, self.in_flight.get(key, 0) - 1)
+
+    def observe(self, blueprint, endpoint, method, status, seconds):
+        with self._lock:
+            self._check_fork()
+            key = (blueprint, endpoint, method)
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[len(BUCKETS)] += 1
+            hist[-1] += seconds
+
+            key = (blueprint, endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def _state(self):
+        return {
+            "pid": self.pid,
+            "histograms": [[list(k), v] for k, v in self.histograms.items()],
+            "requests": [[list(k), v] for k, v in self.requests.items()],
+            "in_flight": [[list(k), v] for k, v in self.in_flight.items()],
+        }
+
+    def flush(self):
+        if not self.directory:
+            return
+        with self._lock:
+            self._check_fork()
+            data = json.dumps(self._state())
+            self._last_flush = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(self.directory, f"metrics-{self.pid}.json"))
+
+    def _fold_exited(self):
+        """Take over the counters of exited workers and delete their files."""
+        claimed = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+            except ValueError:
+                continue
+            if pid == self.pid or _alive(pid):
+                continue
+            # the rename lets exactly one scraping worker fold each file
+            target = f"{path}.{self.pid}.folding"
+            try:
+                os.rename(path, target)
+                with open(target) as f:
+                    state = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                state = None
+            claimed.append(target)
+            if state is None:
+                continue
+            with self._lock:
+                self._check_fork()
+                for key, values in state["histograms"]:
+                    hist = self.histograms.setdefault(tuple(key), [0] * len(values))
+                    for i, v in enumerate(values):
+                        hist[i] += v
+                for key, value in state["requests"]:
+                    self.requests[tuple(key)] = self.requests.get(tuple(key), 0) + value
+        if claimed:
+            self.flush()
+            for target in claimed:
+                os.remove(target)
+
+    def collect(self):
+        """Merged state of this process and, with a directory, every other one."""
+        if not self.directory:
+            with self._lock:
+                return [self._state()]
+
+        self._fold_exited()
+        self.flush()
+        states = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return states
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render(states):
+    histograms, requests, in_flight = {}, {}, {}
+    for state in states:
+        for key, values in state["histograms"]:
+            merged = histograms.setdefault(tuple(key), [0] * len(values))
+            for i, v in enumerate(values):
+                merged[i] += v
+        for key, value in state["requests"]:
+            requests[tuple(key)] = requests.get(tuple(key), 0) + value
+        if _alive(state["pid"]):
+            for key, value in state["in_flight"]:
+                in_flight[tuple(key)] = in_flight.get(tuple(key), 0) + value
+
+    hist_labels = ("blueprint", "endpoint", "method")
+    lines = [
+        "# HELP nahb_http_request_duration_seconds Request latency by endpoint.",
+        "# TYPE nahb_http_request_duration_seconds histogram",
+    ]
+    for key, values in sorted(histograms.items()):
+        for bound, count in zip(BUCKETS + ("+Inf",), values):
+            lines.append(f"nahb_http_request_duration_seconds_bucket{_labels(hist_labels, key, le=bound)} {count}")
+        lines.append(f"nahb_http_request_duration_seconds_sum{_labels(hist_labels, key)} {values[-1]}")
+        lines.append(f"nahb_http_request_duration_seconds_count{_labels(hist_labels, key)} {values[len(BUCKETS)]}")
+
+    lines += [
+        "# HELP nahb_http_requests_total Finished requests by endpoint and status code.",
+        "# TYPE nahb_http_requests_total counter",
+    ]
+    for key, value in sorted(requests.items()):
+        lines.append(f"nahb_http_requests_total{_labels(hist_labels + ('status',), key)} {value}")
+
+    lines += [
+        "# HELP nahb_http_requests_in_flight Requests currently being served.",
+        "# TYPE nahb_http_requests_in_flight gauge",
+    ]
+    for key, value in sorted(in_flight.items()):
+        lines.append(f"nahb_http_requests_in_flight{_labels(('blueprint', 'endpoint'), key)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+@bp.get("/metrics")
+def metrics():
+    states = current_app.extensions["metrics"].collect()
+    return Response(render(states), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    recorder = RequestMetrics(app.config["METRICS_DIR"], app.config["METRICS_FLUSH_INTERVAL"])
+    app.extensions["metrics"] = recorder
+    atexit.register(recorder.flush)
+
+    def labels():
+        return request.blueprint or "", request.endpoint or "<unmatched>"
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        recorder.start(*labels())
+
+    @app.after_request
+    def record_request(response):
+        if "metrics_start" in g:
+            recorder.observe(*labels(), request.method, response.status_code,
+                             time.perf_counter() - g.metrics_start)
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if "metrics_start" in g:
+            recorder.finish(*labels())
@@ -14,6 +14,14 @@ class StoryStatus(str, Enum):
 
 class Story(db.Model):
     __tablename__ = "stories"
+    __table_args__ = (
+        # keyset pagination of GET /stories, with and without ?status=
+        db.Index("ix_stories_status_created_at", "status", "created_at", "id"),
+        db.Index("ix_stories_created_at", "created_at", "id"),
+        # AUTOINCREMENT: a deleted story's id is never handed out again, so
+        # (id, version) validators and cache keys cannot match a new story
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -26,7 +34,10 @@ class Story(db.Model):
         default=StoryStatus.draft.value,
     )
 
-    start_page_id = db.Column(db.Integer, db.ForeignKey("pages.id"), nullable=True)
+    start_page_id = db.Column(db.Integer, db.ForeignKey("pages.id"), nullable=True, index=True)
+
+    # bumped on every change to the story, its pages or their choices
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(
@@ -56,10 +67,11 @@ class Story(db.Model):
 
 class Page(db.Model):
     __tablename__ = "pages"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = db.Column(db.Integer, primary_key=True)
 
-    story_id = db.Column(db.Integer, db.ForeignKey("stories.id"), nullable=False)
+    story_id = db.Column(db.Integer, db.ForeignKey("stories.id"), nullable=False, index=True)
     text = db.Column(db.Text, nullable=False)
 
     is_ending = db.Column(db.Boolean, nullable=False, default=False)
@@ -80,6 +92,7 @@ class Page(db.Model):
         back_populates="page",
         cascade="all, delete-orphan",
         foreign_keys="Choice.page_id",
+        order_by="Choice.id",
     )
 
     def to_dict(self) -> dict:
@@ -97,10 +110,10 @@ class Choice(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    page_id = db.Column(db.Integer, db.ForeignKey("pages.id"), nullable=False)
+    page_id = db.Column(db.Integer, db.ForeignKey("pages.id"), nullable=False, index=True)
     text = db.Column(db.String(200), nullable=False)
 
-    next_page_id = db.Column(db.Integer, db.ForeignKey("pages.id"), nullable=False)
+    next_page_id = db.Column(db.Integer, db.ForeignKey("pages.id"), nullable=False, index=True)
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
@@ -114,3 +127,27 @@ class Choice(db.Model):
             "text": self.text,
             "next_page_id": self.next_page_id,
         }
+
+
+class ChangeLog(db.Model):
+    """One row per story or page write, read back by GET /changes."""
+
+    __tablename__ = "change_log"
+    # AUTOINCREMENT: ids are never reused, so they work as a feed cursor
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    story_id = db.Column(db.Integer, nullable=False)
+    page_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.String(20), nullable=False)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "story_id": self.story_id,
+            "page_id": self.page_id,
+            "action": self.action,
+        }
@@ -0,0 +1,68 @@
+# flask_api/app/profiling.py
+"""Profile single requests with cProfile.
+
+A request is profiled when it carries an X-Profile header equal to the API
+key, or when it is picked by PROFILE_SAMPLE_RATE. The profile is written to
+PROFILE_DIR as a .pstats file (open it with `python -m pstats`, snakeviz or
+convert it for speedscope) and its name is returned in X-Profile-Id.
+Other requests only pay for one header lookup.
+"""
+import cProfile
+import hmac
+import os
+import random
+import time
+import uuid
+
+from flask import current_app, g, request
+
+
+def _wants_profile(app):
+    header = request.headers.get("X-Profile")
+    if header:
+        expected = app.config.get("API_KEY") or ""
+        return bool(expected) and hmac.compare_digest(header, expected)
+    rate = app.config["PROFILE_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def profile_dir():
+    return current_app.config["PROFILE_DIR"] or os.path.join(current_app.instance_path, "profiles")
+
+
+def init_profiling(app):
+    @app.before_request
+    def start_profile():
+        if not _wants_profile(app):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is already active on this thread
+            return
+        g.profiler = profiler
+
+    @app.after_request
+    def save_profile(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+
+        name = "{}-{}-{}.pstats".format(
+            time.strftime("%Y%m%dT%H%M%S"), request.endpoint or "unmatched", uuid.uuid4().hex[:8]
+        )
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(directory, name))
+
+        response.headers["X-Profile-Id"] = name
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        # after_request did not run (the request failed); never leave it enabled
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
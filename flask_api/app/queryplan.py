@@ -0,0 +1,128 @@
+# flask_api/app/queryplan.py
+"""EXPLAIN QUERY PLAN regression check for the hot API routes.
+
+Builds a throwaway SQLite database from the models, seeds a small story,
+replays each route through the test client and runs EXPLAIN QUERY PLAN on
+every statement it emitted. A plain "SCAN <table>" (a full table scan
+without an index) on one of our tables counts as a failure.
+"""
+import os
+import re
+import shutil
+import tempfile
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+HOT_ROUTES = [
+    ("GET", "/stories"),
+    ("GET", "/stories?status=published"),
+    ("GET", "/stories?status=published&fields=id,title&limit=1"),
+    ("GET", "/stories/{story_id}"),
+    ("GET", "/stories/{story_id}/start"),
+    ("GET", "/stories/{story_id}/graph"),
+    ("GET", "/pages/{page_id}"),
+    ("POST", "/stories/{story_id}/pages"),
+    ("POST", "/pages/{page_id}/choices"),
+    ("PUT", "/stories/{story_id}"),
+    ("POST", "/stories/{story_id}/graph"),
+    ("DELETE", "/stories/{scratch_story_id}"),
+]
+
+_TABLE_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def _payload(method, path, ids):
+    if method == "PUT":
+        return {"title": "renamed"}
+    if path.endswith("/pages"):
+        return {"text": "another page"}
+    if path.endswith("/choices"):
+        return {"text": "back", "next_page_id": ids["page_id"]}
+    if path.endswith("/graph"):
+        return {
+            "pages": [{"ref": "extra", "text": "extra"}],
+            "choices": [{"page": ids["page_id"], "next_page": "extra", "text": "on"}],
+        }
+    return None
+
+
+def _seed(client, headers):
+    def post(path, data):
+        r = client.post(path, json=data, headers=headers)
+        assert r.status_code == 201, (path, r.status_code, r.get_data(as_text=True))
+        return r.get_json()
+
+    story_id = post("/stories", {"title": "plan check", "status": "published"})["id"]
+    graph = post(f"/stories/{story_id}/graph", {
+        "pages": [{"ref": f"p{i}", "text": f"page {i}", "is_ending": i == 4} for i in range(5)],
+        "choices": [{"page": f"p{i}", "next_page": f"p{i + 1}", "text": "next"} for i in range(4)],
+        "start_page": "p0",
+    })
+    scratch_id = post("/stories", {"title": "scratch"})["id"]
+    post(f"/stories/{scratch_id}/pages", {"text": "scratch"})
+    for i in range(3):
+        post("/stories", {"title": f"filler {i}", "status": "draft"})
+
+    return {"story_id": story_id, "page_id": graph["pages"]["p1"], "scratch_story_id": scratch_id}
+
+
+def check_query_plans(create_app):
+    """Return (report lines, failures) for every statement of HOT_ROUTES."""
+    tmp = tempfile.mkdtemp(prefix="nahb-plans-")
+    try:
+        return _check(create_app, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _check(create_app, tmp):
+    # everything the routes write goes to the temp dir, never instance/
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "plans.sqlite3"),
+        "API_KEY": "plan-check",
+        "STORY_CACHE_MAX_BYTES": 0,
+        "SNAPSHOT_DIR": os.path.join(tmp, "snapshots"),
+        "PROFILE_DIR": os.path.join(tmp, "profiles"),
+    })
+    headers = {"X-API-KEY": "plan-check"}
+    report, failures = [], []
+
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+        client = app.test_client()
+        ids = _seed(client, headers)
+
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            verb = statement.lstrip().split(None, 1)[0].upper()
+            if verb in ("SELECT", "UPDATE", "DELETE") and not executemany:
+                captured.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            for method, template in HOT_ROUTES:
+                path = template.format(**ids)
+                captured.clear()
+                resp = client.open(path, method=method, headers=headers,
+                                   json=_payload(method, template, ids))
+                report.append(f"{method} {path} -> {resp.status_code}, {len(captured)} statements")
+                statements = list(captured)
+
+                with engine.connect() as conn:
+                    for statement, parameters in statements:
+                        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                        for row in plan:
+                            detail = row[-1]
+                            report.append(f"    {detail}")
+                            m = _TABLE_SCAN.match(detail)
+                            if m and m.group(1) in db.metadata.tables:
+                                failures.append((f"{method} {template}", detail, " ".join(statement.split())))
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        db.engine.dispose()
+
+    return report, failures
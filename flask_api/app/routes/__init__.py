@@ -1,2 +1,4 @@
 from .stories import bp as stories_bp
 from .pages import bp as pages_bp
+from .search import bp as search_bp
+from .changes import bp as changes_bp
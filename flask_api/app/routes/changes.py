@@ -0,0 +1,35 @@
+from flask import Blueprint, request, jsonify, abort, current_app
+
+from app.changes import DELETED, changes_since
+
+bp = Blueprint("changes", __name__, url_prefix="/changes")
+
+
+@bp.get("")
+def list_changes():
+    since = request.args.get("since", 0, type=int)
+    if since < 0:
+        abort(400, "since must be a cursor from a previous response")
+
+    limit = request.args.get("limit", current_app.config["CHANGES_PAGE_SIZE"], type=int)
+    limit = max(1, min(limit, current_app.config["CHANGES_MAX_PAGE_SIZE"]))
+
+    rows = changes_since(since, limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # the last story-level action in the window wins
+    last = {}
+    for c in rows:
+        if c.page_id is None or c.story_id not in last:
+            last[c.story_id] = c.action if c.page_id is None else None
+    deleted = {story_id for story_id, action in last.items() if action == DELETED}
+
+    return jsonify({
+        "changes": [c.to_dict() for c in rows],
+        "stories": sorted(set(last) - deleted),
+        "pages": sorted({c.page_id for c in rows if c.page_id is not None}),
+        "deleted_stories": sorted(deleted),
+        "cursor": rows[-1].id if rows else since,
+        "has_more": has_more,
+    })
@@ -1,25 +1,192 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort, current_app
+from sqlalchemy import insert, join, select
+
+from app.changes import UPDATED, record_change
+from app.conditional import conditional_json, make_etag
 from app.extensions import db
-from app.models import Page, Choice
-from app.security import require_api_key  
+from app.graph_cache import expand_next_pages, get_story_cache, wants_next_pages
+from app.models import Story, StoryStatus, Page, Choice
+from app.security import require_api_key
+from app.story_graph import bump_story_version, load_pages, select_page_rows, split_page_rows
 
 bp = Blueprint("pages", __name__, url_prefix="/pages")
 
+@bp.get("")
+def get_pages():
+    page_ids = _parse_ids(request.args.get("ids"))
+
+    cache = get_story_cache()
+    found = {}
+    for page_id in page_ids:
+        hit = cache.get_page(page_id)
+        if hit is not None:
+            cached = hit[1]
+            found[page_id] = {"page": cached["page"], "choices": cached["choices"]}
+
+    rest = [page_id for page_id in page_ids if page_id not in found]
+    if rest:
+        found.update(load_pages(rest))
+
+    return jsonify({
+        "pages": [found[page_id] for page_id in page_ids if page_id in found],
+        "missing": [page_id for page_id in page_ids if page_id not in found],
+    })
+
+
+def _parse_ids(value):
+    try:
+        page_ids = [int(v) for v in (value or "").split(",") if v.strip()]
+    except ValueError:
+        abort(400, "ids must be a comma-separated list of integers")
+    page_ids = list(dict.fromkeys(page_ids))
+
+    if not page_ids:
+        abort(400, "ids is required")
+    if len(page_ids) > current_app.config["PAGES_MULTIGET_MAX"]:
+        abort(400, f"at most {current_app.config['PAGES_MULTIGET_MAX']} ids per request")
+    return page_ids
+
+
 @bp.get("/<int:page_id>")
 def get_page(page_id):
-    page = Page.query.get_or_404(page_id)
-    return jsonify({"page": page.to_dict(), "choices": [c.to_dict() for c in page.choices]})
+    cache = get_story_cache()
+    hit = cache.get_page(page_id)
+    if hit is not None:
+        return _cached_page_response(*hit)
+
+    # the page, its choices and the story validators in one statement
+    rows = db.session.execute(
+        select_page_rows(
+            Page.updated_at, Story.version, Story.updated_at, Story.status,
+            from_=join(Page, Story, Page.story_id == Story.id),
+        ).where(Page.id == page_id)
+    ).all()
+    if not rows:
+        abort(404)
+    (updated_at, version, story_updated_at, status), page, choices = split_page_rows(rows, 4)
+
+    if status == StoryStatus.published.value and cache.wants(page["story_id"], version):
+        entry = cache.load(page["story_id"])
+        if entry is not None and page_id in entry["pages"]:
+            return _cached_page_response(entry, entry["pages"][page_id])
+
+    return page_response(
+        make_etag("page", page_id, version),
+        max(updated_at, story_updated_at),
+        lambda: {"page": page, "choices": choices},
+    )
+
+
+def _cached_page_response(entry, cached):
+    return page_response(
+        make_etag("page", cached["page"]["id"], entry["version"]),
+        max(cached["updated_at"], entry["updated_at"]),
+        lambda: {"page": cached["page"], "choices": cached["choices"]},
+        entry,
+    )
+
+
+def page_response(etag, last_modified, build, entry=None):
+    """A page payload, with the pages its choices lead to when ?include=next."""
+    if not wants_next_pages():
+        return conditional_json(etag, last_modified, build)
+
+    def build_with_next():
+        payload = build()
+        return {**payload, "next_pages": expand_next_pages(payload["choices"], entry)}
+
+    return conditional_json(make_etag(etag, "next"), last_modified, build_with_next)
 
 @bp.post("/<int:page_id>/choices")
 def create_choice(page_id):
     r = require_api_key()
     if r: return r
 
-    Page.query.get_or_404(page_id)
     data = request.get_json(force=True)
+    if isinstance(data, list):
+        return _create_choices(page_id, data)
+
+    page = Page.query.get_or_404(page_id)
 
     choice = Choice(page_id=page_id, text=data["text"], next_page_id=data["next_page_id"])
     db.session.add(choice)
+    bump_story_version(page.story_id)
+    record_change(page.story_id, UPDATED, [page_id])
     db.session.commit()
+    get_story_cache().invalidate(page.story_id)
 
     return jsonify(choice.to_dict()), 201
+
+
+def _create_choices(page_id, items):
+    """Insert an array of choices in one statement; 201, or 207 with per-item errors."""
+    if not items:
+        abort(400, "choices must not be empty")
+    if len(items) > current_app.config["CHOICES_BATCH_MAX"]:
+        abort(400, f"at most {current_app.config['CHOICES_BATCH_MAX']} choices per request")
+
+    # the page and every target in one query; targets must share its story
+    targets = {
+        item["next_page_id"] for item in items
+        if isinstance(item, dict) and _is_id(item.get("next_page_id"))
+    }
+    stories = dict(db.session.execute(
+        select(Page.id, Page.story_id).where(Page.id.in_(targets | {page_id}))
+    ).all())
+    story_id = stories.get(page_id)
+    if story_id is None:
+        abort(404)
+
+    results, rows = [], []
+    for i, item in enumerate(items):
+        error = _choice_error(item, stories, story_id)
+        results.append({"index": i, "status": 400, "error": error} if error else None)
+        if not error:
+            rows.append((i, {"page_id": page_id, "text": item["text"], "next_page_id": item["next_page_id"]}))
+
+    if rows:
+        # RETURNING rows come back in no set order; choices with the same text
+        # and target are interchangeable, so pair them with items by value
+        ids = {}
+        for choice_id, text, next_page_id in db.session.execute(
+            insert(Choice).returning(Choice.id, Choice.text, Choice.next_page_id),
+            [values for _, values in rows],
+        ):
+            ids.setdefault((text, next_page_id), []).append(choice_id)
+        bump_story_version(story_id)
+        record_change(story_id, UPDATED, [page_id])
+        db.session.commit()
+        get_story_cache().invalidate(story_id)
+
+        for i, values in rows:
+            choice_id = ids[values["text"], values["next_page_id"]].pop(0)
+            results[i] = {"index": i, "status": 201, "choice": {"id": choice_id, **values}}
+
+    if len(rows) == len(items):
+        status = 201
+    elif rows:
+        status = 207
+    else:
+        status = 400
+    return jsonify({"results": results}), status
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _choice_error(item, stories, story_id):
+    if not isinstance(item, dict):
+        return "choice must be an object"
+    if not isinstance(item.get("text"), str) or not item["text"].strip():
+        return "text is required"
+    if len(item["text"]) > Choice.text.type.length:
+        return f"text is longer than {Choice.text.type.length} characters"
+    next_page_id = item.get("next_page_id")
+    if not _is_id(next_page_id):
+        return "next_page_id must be an integer"
+    if next_page_id not in stories:
+        return f"page {next_page_id} does not exist"
+    if stories[next_page_id] != story_id:
+        return f"page {next_page_id} belongs to another story"
+    return None
@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify, abort, current_app
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.search import build_match_query, search_stories
+
+bp = Blueprint("search", __name__, url_prefix="/search")
+
+
+@bp.get("")
+def search():
+    match = build_match_query(request.args.get("q"))
+    if match is None:
+        abort(400, "q is required")
+
+    limit = request.args.get("limit", current_app.config["SEARCH_PAGE_SIZE"], type=int)
+    limit = max(1, min(limit, current_app.config["SEARCH_MAX_PAGE_SIZE"]))
+    offset = max(0, request.args.get("offset", 0, type=int))
+
+    if db.session.get_bind().dialect.name != "sqlite":
+        return jsonify({"error": "Search needs SQLite FTS5"}), 501
+
+    try:
+        results = search_stories(match, request.args.get("status"), limit + 1, offset)
+    except OperationalError:
+        current_app.logger.exception("search failed")
+        return jsonify({"error": "Search index unavailable, run `flask search-index`"}), 503
+
+    return jsonify({
+        "results": results[:limit],
+        "next_offset": offset + limit if len(results) > limit else None,
+    })
@@ -1,43 +1,273 @@
-from flask import Blueprint, request, jsonify, abort
+import base64
+import json
+from datetime import datetime
 
+from flask import Blueprint, request, jsonify, abort, current_app, send_file
+from sqlalchemy import outerjoin, select, tuple_
+
+from app.changes import CREATED, UPDATED, record_change
+from app.conditional import conditional_json, hashed_etag, make_etag, not_modified, set_validators
 from app.extensions import db
-from app.models import Story, Page
+from app.analysis import analyze_graph, load_graph_rows
+from app.ending_odds import ending_odds
+from app.graph_cache import get_story_cache, get_version_cache
+from app.json_provider import rows_response
+from app.models import Story, StoryStatus, Page
+from app.routes.pages import page_response
 from app.security import require_api_key
+from app.snapshots import ENCODINGS, compile_snapshot, ensure_snapshot, remove_snapshots, snapshot_path
+from app.story_graph import (
+    GraphError, apply_story_graph, bump_story_version, clone_story_graph, delete_story_graph,
+    load_story_graph, select_page_rows, split_page_rows,
+)
 
 bp = Blueprint("stories", __name__, url_prefix="/stories")
 
 
+# columns a client can ask for with ?fields=
+LIST_FIELDS = ("id", "title", "description", "status", "start_page_id")
+
+
 @bp.get("")
 def list_stories():
     status = request.args.get("status")
+    fields = _parse_fields(request.args.get("fields"))
+    limit = _parse_limit(request.args.get("limit"))
+    cursor = _decode_cursor(request.args.get("cursor"))
 
-    query = Story.query
+    stmt = select(
+        *(getattr(Story, f) for f in fields),
+        Story.created_at.label("_created_at"),
+        Story.id.label("_id"),
+        Story.version.label("_version"),
+    )
     if status:
-        query = query.filter_by(status=status)
+        stmt = stmt.where(Story.status == status)
+    if cursor:
+        stmt = stmt.where(tuple_(Story.created_at, Story.id) > tuple_(*cursor))
+    stmt = stmt.order_by(Story.created_at, Story.id).limit(limit + 1)
+
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # validate the page that was asked for rather than the whole catalog;
+    # a deleted row, a new neighbour or any version bump changes the tag
+    etag = hashed_etag("stories", sorted(request.args.items(multi=True)),
+                       [(row._id, row._version) for row in rows], has_more)
+    r = not_modified(etag)
+    if r:
+        return r
+
+    resp = rows_response(fields, rows)
+    if has_more:
+        resp.headers["X-Next-Cursor"] = _encode_cursor(rows[-1]._created_at, rows[-1]._id)
+    return set_validators(resp, etag)
+
+
+def _parse_fields(value):
+    if not value:
+        return LIST_FIELDS
+
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in LIST_FIELDS]
+    if unknown or not fields:
+        abort(400, f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _parse_limit(value):
+    default = current_app.config["STORIES_PAGE_SIZE"]
+    maximum = current_app.config["STORIES_MAX_PAGE_SIZE"]
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        abort(400, "limit must be an integer")
+    return max(1, min(limit, maximum))
+
+
+def _encode_cursor(created_at, story_id):
+    raw = json.dumps([created_at.isoformat(), story_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
 
-    stories = query.all()
-    return jsonify([s.to_dict() for s in stories])
+def _decode_cursor(value):
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        created_at, story_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(story_id)
+    except (ValueError, TypeError):
+        abort(400, "Invalid cursor")
 
 
 @bp.get("/<int:story_id>")
 def get_story(story_id):
     story = Story.query.get_or_404(story_id)
-    return jsonify(story.to_dict())
+
+    return conditional_json(make_etag("story", story.id, story.version), story.updated_at, story.to_dict)
 
 
 @bp.get("/<int:story_id>/start")
 def get_start_page(story_id):
-    story = Story.query.get_or_404(story_id)
+    cache = get_story_cache()
+    entry = cache.get(story_id)
+    row = None
+
+    if entry is None:
+        row = _start_page_row(story_id)
+        (version, _, status, _, _), _, _ = row
+        if status == StoryStatus.published.value and cache.wants(story_id, version):
+            entry = cache.load(story_id)
+
+    if entry is not None and entry["start_page_id"] in entry["pages"]:
+        cached = entry["pages"][entry["start_page_id"]]
+        return page_response(
+            make_etag("start", story_id, entry["version"]),
+            max(entry["updated_at"], cached["updated_at"]),
+            lambda: {"page": cached["page"], "choices": cached["choices"]},
+            entry,
+        )
+
+    if row is None:
+        row = _start_page_row(story_id)
+    (version, story_updated_at, _, _, updated_at), page, choices = row
+
+    return page_response(
+        make_etag("start", story_id, version),
+        max(story_updated_at, updated_at),
+        lambda: {"page": page, "choices": choices},
+    )
+
+
+def _start_page_row(story_id):
+    # the story, its start page and that page's choices in one statement
+    rows = db.session.execute(
+        select_page_rows(
+            Story.version, Story.updated_at, Story.status, Story.start_page_id, Page.updated_at,
+            from_=outerjoin(Story, Page, Page.id == Story.start_page_id),
+        ).where(Story.id == story_id)
+    ).all()
+
+    if not rows:
+        abort(404)
+    row = split_page_rows(rows, 5)
+    (_, _, _, start_page_id, _), page, _ = row
+    if not start_page_id:
+        abort(400, "Story has no start page")
+    if page is None:
+        abort(404)
+    return row
+
+
+@bp.get("/<int:story_id>/graph")
+def get_story_graph(story_id):
+    graph = load_story_graph(story_id)
+    if graph is None:
+        abort(404)
+
+    return jsonify(graph)
+
+
+@bp.get("/<int:story_id>/snapshot")
+def get_story_snapshot(story_id):
+    row = db.session.execute(
+        select(Story.version, Story.status).where(Story.id == story_id)
+    ).first()
+    if row is None:
+        abort(404)
+    if row.status != StoryStatus.published.value:
+        abort(404, "Story is not published")
 
-    if not story.start_page_id:
+    if not ensure_snapshot(story_id, row.version):
+        # the story changed while compiling; answer from the database instead
+        graph = load_story_graph(story_id)
+        if graph is None:
+            abort(404)
+        return jsonify(graph)
+
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    resp = send_file(
+        snapshot_path(story_id, row.version, encoding),
+        mimetype="application/json",
+        download_name=f"story-{story_id}.json",
+        etag=make_etag("snapshot", story_id, row.version, encoding or "identity"),
+        conditional=True,
+    )
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+@bp.get("/<int:story_id>/analysis")
+def get_story_analysis(story_id):
+    row = db.session.execute(
+        select(Story.version, Story.updated_at, Story.start_page_id).where(Story.id == story_id)
+    ).first()
+    if row is None:
+        abort(404)
+
+    def build():
+        cache = get_version_cache()
+        key = ("analysis", story_id, row.version)
+        result = cache.get(key)
+        if result is None:
+            result = analyze_graph(row.start_page_id, *load_graph_rows(story_id))
+            cache.put(key, result, len(json.dumps(result)))
+        return result
+
+    return conditional_json(make_etag("analysis", story_id, row.version), row.updated_at, build)
+
+
+@bp.get("/<int:story_id>/ending-odds")
+def get_story_ending_odds(story_id):
+    row = db.session.execute(
+        select(Story.version, Story.updated_at, Story.start_page_id).where(Story.id == story_id)
+    ).first()
+    if row is None:
+        abort(404)
+
+    # checked before any cached result or validator can answer for the story
+    if row.start_page_id is None:
         abort(400, "Story has no start page")
 
-    page = Page.query.get_or_404(story.start_page_id)
+    def build():
+        cache = get_version_cache()
+        key = ("ending-odds", story_id, row.version, row.start_page_id)
+        result = cache.get(key)
+        if result is None:
+            result = ending_odds(row.start_page_id, *load_graph_rows(story_id))
+            if result is None:
+                abort(400, "Start page is not part of the story")
+            cache.put(key, result, len(json.dumps(result)))
+        return result
+
+    return conditional_json(make_etag("ending-odds", story_id, row.version), row.updated_at, build)
+
+
+@bp.post("/<int:story_id>/graph")
+def upsert_story_graph(story_id):
+    r = require_api_key()
+    if r:
+        return r
+
+    Story.query.get_or_404(story_id)
+    data = request.get_json(force=True)
+
+    try:
+        result = apply_story_graph(story_id, data)
+    except GraphError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify({
-        "page": page.to_dict(),
-        "choices": [c.to_dict() for c in page.choices]
-    })
+    db.session.commit()
+    get_story_cache().invalidate(story_id)
+
+    return jsonify(result), 201
 
 
 @bp.post("")
@@ -53,11 +283,31 @@ def create_story():
         status=data.get("status", "draft"),
     )
     db.session.add(story)
+    db.session.flush()
+    record_change(story.id, CREATED)
     db.session.commit()
 
     return jsonify(story.to_dict()), 201
 
 
+@bp.post("/<int:story_id>/clone")
+def clone_story(story_id):
+    r = require_api_key()
+    if r:
+        return r
+    # explicit page ids would bypass the id sequence of other databases
+    if db.session.get_bind().dialect.name != "sqlite":
+        return jsonify({"error": "Cloning needs SQLite"}), 501
+    data = request.get_json(silent=True) or {}
+
+    new_id = clone_story_graph(story_id, data.get("title"), data.get("status"))
+    if new_id is None:
+        abort(404)
+    db.session.commit()
+
+    return jsonify(db.session.get(Story, new_id).to_dict()), 201
+
+
 @bp.put("/<int:story_id>")
 def update_story(story_id):
     r = require_api_key()
@@ -70,8 +320,19 @@ def update_story(story_id):
     story.description = data.get("description", story.description)
     story.status = data.get("status", story.status)
     story.start_page_id = data.get("start_page_id", story.start_page_id)
+    story.version = Story.version + 1
+    record_change(story_id, UPDATED)
 
     db.session.commit()
+    get_story_cache().invalidate(story_id)
+
+    if story.status == StoryStatus.published.value:
+        try:
+            compile_snapshot(story_id)
+        except OSError:
+            # readers compile it on demand; the update itself succeeded
+            current_app.logger.exception("could not write snapshot for story %s", story_id)
+
     return jsonify(story.to_dict())
 
 
@@ -80,10 +341,17 @@ def delete_story(story_id):
     r = require_api_key()
     if r:
         return r
-    story = Story.query.get_or_404(story_id)
-
-    db.session.delete(story)
+    touched = delete_story_graph(story_id)
+    if touched is None:
+        abort(404)
     db.session.commit()
+
+    cache = get_story_cache()
+    for other_id in touched | {story_id}:
+        cache.invalidate(other_id)
+    # derived results are keyed (kind, story_id, version)
+    get_version_cache().invalidate_matching(lambda key: key[1] == story_id)
+    remove_snapshots(story_id)
     return "", 204
 
 
@@ -104,6 +372,10 @@ def create_page(story_id):
     )
 
     db.session.add(page)
+    db.session.flush()
+    bump_story_version(story_id)
+    record_change(story_id, CREATED, [page.id])
     db.session.commit()
+    get_story_cache().invalidate(story_id)
 
     return jsonify(page.to_dict()), 201
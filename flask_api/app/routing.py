@@ -0,0 +1,37 @@
+# flask_api/app/routing.py
+"""Send the SQL of read requests to a separate read engine.
+
+When SQLALCHEMY_READ_DATABASE_URI is set (a read-only SQLite connection or a
+replica), it is registered as the "read" bind and every statement issued
+while serving a GET/HEAD/OPTIONS request runs there. Everything else,
+including all require_api_key-guarded writes, stays on the primary engine.
+"""
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+
+READ_BIND = "read"
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and has_request_context()
+            and request.method in READ_METHODS
+        ):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def configure_read_engine(app):
+    """Register the read bind; must run before db.init_app()."""
+    uri = app.config.get("SQLALCHEMY_READ_DATABASE_URI")
+    if not uri:
+        return
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds.setdefault(READ_BIND, uri)
+    app.config["SQLALCHEMY_BINDS"] = binds
@@ -0,0 +1,105 @@
+# flask_api/app/search.py
+"""SQLite FTS5 index over story titles/descriptions and page text.
+
+The *_fts tables are external-content indexes over stories and pages, kept
+current by triggers, so every insert, edit or delete (ORM or bulk SQL) is
+indexed in the same transaction. `flask search-index` creates them when
+missing and rebuilds them from the base tables.
+"""
+import re
+
+from sqlalchemy import text
+
+from app.extensions import db
+
+FTS_TABLES = ("stories_fts", "pages_fts")
+
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5(
+        title, description, content='stories', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+        text, content='pages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS stories_fts_ai AFTER INSERT ON stories BEGIN
+        INSERT INTO stories_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stories_fts_ad AFTER DELETE ON stories BEGIN
+        INSERT INTO stories_fts(stories_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    # only the indexed columns, so version bumps do not touch the index
+    """CREATE TRIGGER IF NOT EXISTS stories_fts_au AFTER UPDATE OF title, description ON stories BEGIN
+        INSERT INTO stories_fts(stories_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO stories_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_ai AFTER INSERT ON pages BEGIN
+        INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_ad AFTER DELETE ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_au AFTER UPDATE OF text ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+# story fields are worth more than a hit somewhere in a page
+_SEARCH_SQL = """
+WITH hits AS (
+    SELECT rowid AS story_id, bm25(stories_fts, 10.0, 4.0) AS score, NULL AS page_id
+    FROM stories_fts WHERE stories_fts MATCH :q
+    UNION ALL
+    SELECT p.story_id, bm25(pages_fts), p.id
+    FROM pages_fts JOIN pages AS p ON p.id = pages_fts.rowid
+    WHERE pages_fts MATCH :q
+)
+SELECT s.id, s.title, s.description, s.status, s.start_page_id,
+       MIN(h.score) AS score, COUNT(h.page_id) AS page_hits
+FROM hits AS h JOIN stories AS s ON s.id = h.story_id
+{where}
+GROUP BY s.id
+ORDER BY score, s.id
+LIMIT :limit OFFSET :offset
+"""
+
+
+def build_match_query(q):
+    """Turn free text into a safe FTS5 query: every word, last one as a prefix."""
+    words = re.findall(r"\w+", q or "")
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_stories(match, status=None, limit=20, offset=0):
+    where = "WHERE s.status = :status" if status else ""
+    rows = db.session.execute(
+        text(_SEARCH_SQL.format(where=where)),
+        {"q": match, "status": status, "limit": limit, "offset": offset},
+    ).all()
+    return [
+        {
+            "story": {
+                "id": r.id,
+                "title": r.title,
+                "description": r.description,
+                "status": r.status,
+                "start_page_id": r.start_page_id,
+            },
+            "score": r.score,
+            "page_hits": r.page_hits,
+        }
+        for r in rows
+    ]
+
+
+def rebuild_search_index(connection):
+    for statement in FTS_DDL:
+        connection.exec_driver_sql(statement)
+    for table in FTS_TABLES:
+        connection.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
@@ -0,0 +1,102 @@
+# flask_api/app/snapshots.py
+"""Immutable, versioned JSON snapshots of published stories on disk.
+
+Each version is written once as v<version>.json plus pre-compressed .gz
+(and .br when the optional brotli package is installed) variants, so
+serving a published story is a send_file of a ready-made file.
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Story
+from app.story_graph import fetch_story_graph
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+_SUFFIX = {"br": ".br", "gzip": ".gz", None: ""}
+
+
+def snapshot_root():
+    return current_app.config["SNAPSHOT_DIR"] or os.path.join(current_app.instance_path, "snapshots")
+
+
+def snapshot_path(story_id, version, encoding=None):
+    return os.path.join(snapshot_root(), str(story_id), f"v{version}.json{_SUFFIX[encoding]}")
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp makes the file 0600; a front server sending it via
+        # X-Sendfile may run as another user
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def compile_snapshot(story_id):
+    """Write the current version of a story to disk; returns that version or None."""
+    graph = fetch_story_graph(story_id)
+    if graph is None:
+        return None
+    story, pages, choices = graph
+    version = story.version
+
+    body = json.dumps(
+        {
+            "story": story.to_dict(),
+            "version": version,
+            "pages": [p.to_dict() for p in pages],
+            "choices": [c.to_dict() for c in choices],
+        },
+        separators=(",", ":"),
+    ).encode()
+
+    # a write landed between our reads; the next reader compiles again
+    if db.session.scalar(select(Story.version).where(Story.id == story_id)) != version:
+        return None
+
+    os.makedirs(os.path.dirname(snapshot_path(story_id, version)), exist_ok=True)
+    _write_atomic(snapshot_path(story_id, version, "gzip"), gzip.compress(body, 9, mtime=0))
+    if brotli:
+        _write_atomic(snapshot_path(story_id, version, "br"), brotli.compress(body, quality=11))
+    # the plain file goes last: its presence marks the snapshot complete
+    _write_atomic(snapshot_path(story_id, version), body)
+
+    _prune(story_id, keep=version)
+    return version
+
+
+def ensure_snapshot(story_id, version):
+    if os.path.exists(snapshot_path(story_id, version)):
+        return True
+    return compile_snapshot(story_id) == version
+
+
+def _prune(story_id, keep):
+    directory = os.path.dirname(snapshot_path(story_id, keep))
+    for name in os.listdir(directory):
+        if name.startswith("v") and name.split(".json")[0] != f"v{keep}":
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def remove_snapshots(story_id):
+    shutil.rmtree(os.path.join(snapshot_root(), str(story_id)), ignore_errors=True)
@@ -0,0 +1,89 @@
+# flask_api/app/sqlite.py
+"""Selectable SQLite engine profiles.
+
+"default" leaves SQLite and the pool as they come (rollback journal).
+"production" switches to WAL so readers never wait for the writer, adds a
+busy timeout so writers queue instead of failing with "database is locked",
+and sizes the page cache, mmap window and connection pool for a server.
+"""
+from sqlalchemy import create_engine, event
+
+from app.extensions import db
+from app.routing import READ_BIND
+
+PROFILES = {
+    "default": {
+        "pragmas": {},
+        "engine_options": {},
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,  # negative means KiB
+            "temp_store": "MEMORY",
+        },
+        "engine_options": {
+            "pool_size": 10,
+            "max_overflow": 10,
+            "pool_timeout": 10,
+            "connect_args": {"timeout": 5, "check_same_thread": False},
+        },
+    },
+}
+
+
+def _profile(name):
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown SQLITE_PROFILE {name!r}, expected one of {sorted(PROFILES)}")
+
+
+def apply_pragmas(engine, pragmas):
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def configure_sqlite_engine(app):
+    """Merge the profile's pool options into SQLALCHEMY_ENGINE_OPTIONS.
+
+    Must run before db.init_app(); explicit options in the config win.
+    """
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    profile = _profile(app.config["SQLITE_PROFILE"])
+    options = dict(profile["engine_options"])
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def init_sqlite_pragmas(app):
+    profile = _profile(app.config["SQLITE_PROFILE"])
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name != "sqlite":
+                continue
+            pragmas = dict(profile["pragmas"])
+            if key == READ_BIND:
+                # the journal mode belongs to the database file and a
+                # read-only connection may not change it; the primary does
+                pragmas.pop("journal_mode", None)
+            apply_pragmas(engine, pragmas)
+
+
+def profile_engine(url, name):
+    """A standalone engine configured like an app using profile `name`."""
+    profile = _profile(name)
+    engine = create_engine(url, **profile["engine_options"])
+    apply_pragmas(engine, profile["pragmas"])
+    return engine
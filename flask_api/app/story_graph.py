@@ -0,0 +1,412 @@
+# flask_api/app/story_graph.py
+from datetime import datetime
+
+from sqlalchemy import case, column, delete, func, insert, literal, or_, select, table, update
+from sqlalchemy.orm import aliased
+
+from app.changes import CREATED, DELETED, UPDATED, record_change
+from app.extensions import db
+from app.models import Story, StoryStatus, Page, Choice
+
+
+def fetch_story_graph(story_id):
+    """Load a story with all of its pages and choices in three statements.
+
+    Returns (story, pages, choices), or None when the story does not exist.
+    """
+    story = db.session.get(Story, story_id)
+    if story is None:
+        return None
+
+    pages = db.session.scalars(
+        select(Page).where(Page.story_id == story_id).order_by(Page.id)
+    ).all()
+
+    choices = db.session.scalars(
+        select(Choice)
+        .join(Page, Choice.page_id == Page.id)
+        .where(Page.story_id == story_id)
+        .order_by(Choice.id)
+    ).all()
+
+    return story, pages, choices
+
+
+def load_story_graph(story_id):
+    graph = fetch_story_graph(story_id)
+    if graph is None:
+        return None
+    story, pages, choices = graph
+
+    return {
+        "story": story.to_dict(),
+        "pages": [p.to_dict() for p in pages],
+        "choices": [c.to_dict() for c in choices],
+    }
+
+
+# the columns behind Page.to_dict() and Choice.to_dict(), for reads that
+# build payloads straight from row tuples instead of ORM objects
+PAGE_FIELDS = ("id", "story_id", "text", "is_ending", "ending_label")
+CHOICE_FIELDS = ("id", "page_id", "text", "next_page_id")
+PAGE_COLUMNS = tuple(getattr(Page, f) for f in PAGE_FIELDS)
+CHOICE_COLUMNS = tuple(getattr(Choice, f) for f in CHOICE_FIELDS)
+
+
+def select_page_rows(*columns, from_=Page):
+    """`columns`, then the page and one of its choices, one row per choice.
+
+    A page without choices still yields one row, with NULL choice columns.
+    Read the rows back with split_page_rows().
+    """
+    return (
+        select(*columns, *PAGE_COLUMNS, *CHOICE_COLUMNS)
+        .select_from(from_)
+        .outerjoin(Choice, Choice.page_id == Page.id)
+        .order_by(Choice.id)
+    )
+
+
+def split_page_rows(rows, leading):
+    """(first `leading` columns, page dict or None, choice dicts) of select_page_rows()."""
+    first = rows[0]
+    offset = leading + len(PAGE_FIELDS)
+    page = dict(zip(PAGE_FIELDS, first[leading:offset])) if first[leading] is not None else None
+    choices = [dict(zip(CHOICE_FIELDS, row[offset:])) for row in rows if row[offset] is not None]
+    return tuple(first[:leading]), page, choices
+
+
+def load_pages(page_ids):
+    """Pages and their choices by id, in two statements; unknown ids are left out."""
+    pages = {
+        row[0]: {"page": dict(zip(PAGE_FIELDS, row)), "choices": []}
+        for row in db.session.execute(select(*PAGE_COLUMNS).where(Page.id.in_(page_ids)))
+    }
+    if pages:
+        for row in db.session.execute(
+            select(*CHOICE_COLUMNS).where(Choice.page_id.in_(list(pages))).order_by(Choice.id)
+        ):
+            pages[row[1]]["choices"].append(dict(zip(CHOICE_FIELDS, row)))
+    return pages
+
+
+sqlite_sequence = table("sqlite_sequence", column("name"), column("seq"))
+
+
+def next_free_id(model):
+    """The lowest id above every id `model`'s table has handed out (SQLite).
+
+    AUTOINCREMENT tables remember ids of deleted rows in sqlite_sequence, so
+    explicit ids from here are never reused. Call it once the transaction
+    holds the write lock, or another writer may take the same ids.
+    """
+    issued = db.session.scalar(
+        select(sqlite_sequence.c.seq).where(sqlite_sequence.c.name == model.__tablename__)
+    )
+    highest = db.session.scalar(select(func.max(model.id)))
+    return max(issued or 0, highest or 0) + 1
+
+
+def bump_story_version(story_id):
+    db.session.execute(
+        update(Story)
+        .where(Story.id == story_id)
+        .values(version=Story.version + 1, updated_at=datetime.utcnow())
+    )
+
+
+def delete_story_graph(story_id):
+    """Delete a story, its pages and their choices with set-based statements.
+
+    Choices and start pages of other stories that point into this story are
+    removed or cleared as well, and those stories get a version bump. Returns
+    their ids so the caller can invalidate them after committing. Returns None
+    when the story does not exist.
+    """
+    if db.session.scalar(select(Story.id).where(Story.id == story_id)) is None:
+        return None
+
+    page_ids = select(Page.id).where(Page.story_id == story_id).scalar_subquery()
+
+    touched = set(db.session.scalars(
+        select(Story.id).where(Story.start_page_id.in_(page_ids), Story.id != story_id)
+    ))
+    touched.update(db.session.scalars(
+        select(Page.story_id.distinct())
+        .join(Choice, Choice.page_id == Page.id)
+        .where(Choice.next_page_id.in_(page_ids), Page.story_id != story_id)
+    ))
+
+    for other_id in touched:
+        record_change(other_id, UPDATED, (
+            select(Choice.page_id.distinct())
+            .join(Page, Page.id == Choice.page_id)
+            .where(Page.story_id == other_id, Choice.next_page_id.in_(page_ids))
+        ))
+    record_change(story_id, DELETED, select(Page.id).where(Page.story_id == story_id))
+    record_change(story_id, DELETED)
+
+    # break the stories.start_page_id -> pages cycle before the pages go
+    db.session.execute(
+        update(Story).where(Story.start_page_id.in_(page_ids)).values(start_page_id=None),
+        execution_options={"synchronize_session": False},
+    )
+    for statement in (
+        delete(Choice).where(or_(Choice.page_id.in_(page_ids), Choice.next_page_id.in_(page_ids))),
+        delete(Page).where(Page.story_id == story_id),
+        delete(Story).where(Story.id == story_id),
+    ):
+        db.session.execute(statement, execution_options={"synchronize_session": False})
+
+    for other_id in touched:
+        bump_story_version(other_id)
+        record_change(other_id, UPDATED)
+    return touched
+
+
+def clone_story_graph(story_id, title=None, status=None):
+    """Copy a story with its pages and choices using INSERT ... SELECT.
+
+    The copy is inserted first, so the transaction holds the write lock
+    before page ids are allocated. Its pages take the source ids shifted
+    past every id ever handed out, which keeps the mapping old id -> old id
+    + offset and lets choices and start_page_id be rewritten in SQL. Choices
+    leading into other stories, or to pages that no longer exist, keep their
+    target. The copy gets a version bump like any other graph write, so
+    ETags of its pages never match those of deleted pages. SQLite only:
+    elsewhere the explicit ids would not advance the id sequence. The caller
+    commits.
+    Returns the new story id, or None when the source does not exist.
+    """
+    target = aliased(Page)
+    source = db.session.execute(
+        select(Story.title, Story.description, Story.status, Story.start_page_id, target.story_id)
+        .outerjoin(target, target.id == Story.start_page_id)
+        .where(Story.id == story_id)
+    ).first()
+    if source is None:
+        return None
+
+    now = datetime.utcnow()
+    new_id = db.session.scalar(
+        insert(Story).returning(Story.id).values(
+            title=title or source.title,
+            description=source.description,
+            status=status or StoryStatus.draft.value,
+            created_at=now,
+            updated_at=now,
+        )
+    )
+
+    record_change(new_id, CREATED)
+
+    first_id = db.session.scalar(select(func.min(Page.id)).where(Page.story_id == story_id))
+    if first_id is None:
+        return new_id
+    offset = next_free_id(Page) - first_id
+
+    db.session.execute(
+        insert(Page).from_select(
+            ["id", "story_id", "text", "is_ending", "ending_label", "created_at", "updated_at"],
+            select(
+                Page.id + offset, literal(new_id), Page.text, Page.is_ending, Page.ending_label,
+                literal(now), literal(now),
+            ).where(Page.story_id == story_id).order_by(Page.id),
+        )
+    )
+    db.session.execute(
+        insert(Choice).from_select(
+            ["page_id", "text", "next_page_id", "created_at"],
+            select(
+                Choice.page_id + offset,
+                Choice.text,
+                case((target.story_id == story_id, Choice.next_page_id + offset), else_=Choice.next_page_id),
+                literal(now),
+            )
+            .join(Page, Page.id == Choice.page_id)
+            .outerjoin(target, target.id == Choice.next_page_id)
+            .where(Page.story_id == story_id)
+            .order_by(Choice.id),
+        )
+    )
+
+    if source.start_page_id is not None:
+        start_page_id = source.start_page_id
+        if source.story_id == story_id:
+            start_page_id += offset
+        db.session.execute(update(Story).where(Story.id == new_id).values(start_page_id=start_page_id))
+
+    bump_story_version(new_id)
+    record_change(new_id, CREATED, select(Page.id).where(Page.story_id == new_id))
+    return new_id
+
+
+class GraphError(ValueError):
+    pass
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _page_error(p):
+    if "text" in p and (not isinstance(p["text"], str) or not p["text"].strip()):
+        return "text must be a non-empty string"
+    if "is_ending" in p and not isinstance(p["is_ending"], bool):
+        return "is_ending must be true or false"
+    label = p.get("ending_label")
+    if label is not None:
+        if not isinstance(label, str):
+            return "ending_label must be a string"
+        if len(label) > Page.ending_label.type.length:
+            return f"ending_label is longer than {Page.ending_label.type.length} characters"
+    return None
+
+
+def _insert_rows(model, rows, explicit_ids):
+    """Insert `rows` into `model`'s table and return their ids in order.
+
+    With explicit ids (SQLite, under the write lock) this is one executemany.
+    Otherwise RETURNING is paired with the rows by parameter order.
+    """
+    if explicit_ids:
+        first_id = next_free_id(model)
+        ids = list(range(first_id, first_id + len(rows)))
+        db.session.execute(insert(model), [{"id": i, **row} for i, row in zip(ids, rows)])
+        return ids
+    return db.session.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True), rows
+    ).all()
+
+
+def apply_story_graph(story_id, data):
+    """Insert and update pages and choices of a story in one transaction.
+
+    New pages carry a client-side "ref"; existing pages are addressed by "id".
+    Choices and "start_page" may point at either. The caller commits.
+    """
+    if not isinstance(data, dict):
+        raise GraphError("body must be an object")
+    pages = data.get("pages") or []
+    choices = data.get("choices") or []
+    start_page = data.get("start_page")
+    if not isinstance(pages, list) or not isinstance(choices, list):
+        raise GraphError("pages and choices must be lists")
+
+    new_pages, updated_pages, refs = [], [], []
+    updated_ids, known_refs = set(), set()
+    for i, p in enumerate(pages):
+        if not isinstance(p, dict):
+            raise GraphError(f"pages[{i}] must be an object")
+        if "id" in p:
+            if not _is_id(p["id"]):
+                raise GraphError(f"pages[{i}].id must be an integer")
+            if p["id"] in updated_ids:
+                raise GraphError(f"duplicate page id {p['id']}")
+            updated_ids.add(p["id"])
+            updated_pages.append(p)
+        elif isinstance(p.get("ref"), str):
+            if p["ref"] in known_refs:
+                raise GraphError(f"duplicate page ref {p['ref']!r}")
+            if "text" not in p:
+                raise GraphError(f"pages[{i}] is missing text")
+            known_refs.add(p["ref"])
+            refs.append(p["ref"])
+            new_pages.append(p)
+        else:
+            raise GraphError(f"pages[{i}] needs a string ref or an id")
+        error = _page_error(p)
+        if error:
+            raise GraphError(f"pages[{i}]: {error}")
+
+    # every existing page the payload touches must belong to this story
+    endpoints = [start_page] if start_page is not None else []
+    for i, c in enumerate(choices):
+        if not isinstance(c, dict) or not isinstance(c.get("text"), str) or not c["text"].strip():
+            raise GraphError(f"choices[{i}] needs text")
+        if len(c["text"]) > Choice.text.type.length:
+            raise GraphError(f"choices[{i}] text is longer than {Choice.text.type.length} characters")
+        endpoints += [c.get("page"), c.get("next_page")]
+
+    existing_ids = set(updated_ids)
+    for ref in endpoints:
+        if _is_id(ref):
+            existing_ids.add(ref)
+        elif not isinstance(ref, str) or ref not in known_refs:
+            raise GraphError(f"unknown page reference {ref!r}")
+
+    if existing_ids:
+        found = set(db.session.scalars(
+            select(Page.id).where(Page.id.in_(existing_ids), Page.story_id == story_id)
+        ))
+        missing = sorted(existing_ids - found, key=str)
+        if missing:
+            raise GraphError(f"pages not in story {story_id}: {missing}")
+
+    # the version bump takes the write lock before any id is allocated
+    bump_story_version(story_id)
+    explicit_ids = db.session.get_bind().dialect.name == "sqlite"
+
+    now = datetime.utcnow()
+    ids = {}
+    if new_pages:
+        rows = [
+            {
+                "story_id": story_id,
+                "text": p["text"],
+                "is_ending": bool(p.get("is_ending", False)),
+                "ending_label": p.get("ending_label"),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for p in new_pages
+        ]
+        ids = dict(zip(refs, _insert_rows(Page, rows, explicit_ids)))
+
+    if updated_pages:
+        db.session.execute(
+            update(Page),
+            [
+                {
+                    "id": p["id"],
+                    "updated_at": now,
+                    **{k: p[k] for k in ("text", "is_ending", "ending_label") if k in p},
+                }
+                for p in updated_pages
+            ],
+        )
+
+    def resolve(ref):
+        return ids[ref] if isinstance(ref, str) else ref
+
+    choice_ids = []
+    if choices:
+        rows = [
+            {
+                "page_id": resolve(c["page"]),
+                "next_page_id": resolve(c["next_page"]),
+                "text": c["text"],
+                "created_at": now,
+            }
+            for c in choices
+        ]
+        choice_ids = _insert_rows(Choice, rows, explicit_ids)
+
+    start_page_id = None
+    if start_page is not None:
+        start_page_id = resolve(start_page)
+        db.session.execute(
+            update(Story).where(Story.id == story_id).values(start_page_id=start_page_id)
+        )
+        record_change(story_id, UPDATED)
+
+    record_change(story_id, CREATED, list(ids.values()))
+    touched_pages = updated_ids | {resolve(c["page"]) for c in choices}
+    record_change(story_id, UPDATED, sorted(touched_pages - set(ids.values())))
+
+    return {
+        "pages": ids,
+        "updated_pages": [p["id"] for p in updated_pages],
+        "choices": choice_ids,
+        "start_page_id": start_page_id,
+    }
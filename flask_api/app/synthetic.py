@@ -0,0 +1,52 @@
+# flask_api/app/synthetic.py
+"""Synthetic story graphs for benchmarks and load tests."""
+import random
+
+WORDS = (
+    "the a dark forest door key castle river old map whisper light shadow "
+    "stone path king storm silver wolf tower night fire bridge sword dream"
+).split()
+
+
+def _text(rng, length):
+    words, size = [], 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length].capitalize()
+
+
+def generate_story_graph(pages=100, branching=3, text_length=400, cycle_density=0.1, endings=5, seed=None):
+    """A payload for apply_story_graph() describing one synthetic story.
+
+    Page i always links to page i + 1, so every page is reachable from the
+    start; the other choices jump forward at random, and with probability
+    `cycle_density` a page also links back to an earlier page.
+    """
+    rng = random.Random(seed)
+    pages = max(pages, 2)
+    endings = min(max(endings, 1), pages - 1)
+    first_ending = pages - endings
+
+    payload_pages = [
+        {
+            "ref": f"p{i}",
+            "text": _text(rng, text_length),
+            "is_ending": i >= first_ending,
+            "ending_label": f"Ending {i - first_ending + 1}" if i >= first_ending else None,
+        }
+        for i in range(pages)
+    ]
+
+    choices = []
+    for i in range(first_ending):
+        targets = [i + 1]
+        for _ in range(branching - 1):
+            targets.append(rng.randint(i + 1, pages - 1))
+        if i > 0 and rng.random() < cycle_density:
+            targets.append(rng.randint(0, i - 1))
+        for target in dict.fromkeys(targets):
+            choices.append({"page": f"p{i}", "next_page": f"p{target}", "text": _text(rng, 40)})
+
+    return {"pages": payload_pages, "choices": choices, "start_page": "p0"}
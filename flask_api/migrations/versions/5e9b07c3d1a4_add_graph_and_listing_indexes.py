@@ -0,0 +1,42 @@
+"""add graph and listing indexes
+
+Revision ID: 5e9b07c3d1a4
+Revises: 8c41d2f0a7b3
+Create Date: 2026-10-17 10:03:12.502914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9b07c3d1a4'
+down_revision = '8c41d2f0a7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('pages', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_pages_story_id'), ['story_id'], unique=False)
+
+    with op.batch_alter_table('choices', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_choices_page_id'), ['page_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_choices_next_page_id'), ['next_page_id'], unique=False)
+
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.create_index('ix_stories_status_created_at', ['status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_stories_created_at', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.drop_index('ix_stories_created_at')
+        batch_op.drop_index('ix_stories_status_created_at')
+
+    with op.batch_alter_table('choices', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_choices_next_page_id'))
+        batch_op.drop_index(batch_op.f('ix_choices_page_id'))
+
+    with op.batch_alter_table('pages', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pages_story_id'))
@@ -0,0 +1,26 @@
+"""add story version
+
+Revision ID: 8c41d2f0a7b3
+Revises: 3300f7a18192
+Create Date: 2026-10-17 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41d2f0a7b3'
+down_revision = '3300f7a18192'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,73 @@
+"""add fts5 search index
+
+Revision ID: a2f6c9e41b07
+Revises: 5e9b07c3d1a4
+Create Date: 2026-10-17 11:20:47.310266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2f6c9e41b07'
+down_revision = '5e9b07c3d1a4'
+branch_labels = None
+depends_on = None
+
+
+# kept in step with app/search.py
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5(
+        title, description, content='stories', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+        text, content='pages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS stories_fts_ai AFTER INSERT ON stories BEGIN
+        INSERT INTO stories_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stories_fts_ad AFTER DELETE ON stories BEGIN
+        INSERT INTO stories_fts(stories_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stories_fts_au AFTER UPDATE OF title, description ON stories BEGIN
+        INSERT INTO stories_fts(stories_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO stories_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_ai AFTER INSERT ON pages BEGIN
+        INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_ad AFTER DELETE ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_au AFTER UPDATE OF text ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+TRIGGERS = [
+    'stories_fts_ai', 'stories_fts_ad', 'stories_fts_au',
+    'pages_fts_ai', 'pages_fts_ad', 'pages_fts_au',
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_DDL:
+        op.execute(statement)
+    # index whatever is already there
+    op.execute("INSERT INTO stories_fts(stories_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS pages_fts')
+    op.execute('DROP TABLE IF EXISTS stories_fts')
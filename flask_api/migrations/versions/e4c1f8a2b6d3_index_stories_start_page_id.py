@@ -0,0 +1,26 @@
+"""index stories.start_page_id
+
+Revision ID: e4c1f8a2b6d3
+Revises: a2f6c9e41b07
+Create Date: 2026-10-17 19:21:04.552710
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c1f8a2b6d3'
+down_revision = 'a2f6c9e41b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stories_start_page_id'), ['start_page_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stories_start_page_id'))